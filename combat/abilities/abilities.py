@@ -37,6 +37,12 @@ class Ability(Object):
         self.db.cost = []  # Mana and stamina costs
         self.db.cooldown = 0  # How long before it can be cast again
 
+    def at_object_delete(self):
+        # Have whoever knew this index their abilities again, as all_abilities.abilities_changed() (which imports this)
+        if self.location:
+            self.location.ndb.ability_index = None
+        return super().at_object_delete()
+
     def adjust_cooldowns_stats(self, caster):
         """
         Reset ability cooldown on caster, and remove cost from their mana/stamina.
@@ -1,34 +1,106 @@
 import importlib
 import inspect
+from bisect import bisect_left
 
 from evennia.utils import inherits_from
 
 from combat.abilities.ally_spells import HealWounds
 
-ALL_ABILITIES = {}
 HEALING_ABILITIES = {"Heal Wounds": HealWounds}
 
-for filename in [".ally_abilities", ".ally_spells", ".damage_abilities", ".damage_spells", ".effect_abilities",
-                 ".effect_spells", ".protective_abilities", ".protective_spells", ".self_abilities", ".self_spells",
-                 ".team_abilities", ".team_spells", ".tile_abilities", ".tile_spells", ".misc_abilities"]:
-    members = inspect.getmembers(importlib.import_module(filename, package="combat.abilities"))
-    for member in members:
-        if not isinstance(member[1], type):
-            continue
-        if inherits_from(member[1], "combat.abilities.abilities.Ability"):
-            if member[0] in ["Ability", "Spell", "SustainedAbility", "SustainedSpell", "BowAbility", "TileAbility",
-                             "TileSpell"]:
+ABILITY_MODULES = [".ally_abilities", ".ally_spells", ".damage_abilities", ".damage_spells", ".effect_abilities",
+                   ".effect_spells", ".protective_abilities", ".protective_spells", ".self_abilities", ".self_spells",
+                   ".team_abilities", ".team_spells", ".tile_abilities", ".tile_spells", ".misc_abilities"]
+BASE_CLASSES = ["Ability", "Spell", "SustainedAbility", "SustainedSpell", "BowAbility", "TileAbility", "TileSpell"]
+
+# Built on first use rather than at import, so server boot doesn't have to walk every ability module
+_registry = None
+_index = None
+
+
+class PrefixIndex:
+    """
+    Sorted, lowercased names with bisect lookups, for finding abilities by
+    the start of their name without scanning the whole collection.
+    """
+
+    def __init__(self, named_items):
+        """
+        Args:
+            named_items: iterable of (name, item) pairs
+        """
+        entries = sorted(((name.lower(), item) for name, item in named_items), key=lambda entry: entry[0])
+        self.names = [entry[0] for entry in entries]
+        self.items = [entry[1] for entry in entries]
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, prefix):
+        """Return all items whose name starts with prefix, in name order."""
+        prefix = prefix.lower()
+        found = []
+        i = bisect_left(self.names, prefix)
+        while i < len(self.names) and self.names[i].startswith(prefix):
+            found.append(self.items[i])
+            i += 1
+        return found
+
+    def first(self, prefix):
+        """Return the first item whose name starts with prefix, or None."""
+        prefix = prefix.lower()
+        i = bisect_left(self.names, prefix)
+        if i < len(self.names) and self.names[i].startswith(prefix):
+            return self.items[i]
+        return None
+
+
+def _build_registry():
+    registry = {}
+    for filename in ABILITY_MODULES:
+        members = inspect.getmembers(importlib.import_module(filename, package="combat.abilities"))
+        for member in members:
+            if not isinstance(member[1], type):
                 continue
-            else:
-                # Add to all abilities
-                key = (member[1].key if isinstance(member[1].key, str) else member[0])
-                ALL_ABILITIES[key] = member[1]
+            if inherits_from(member[1], "combat.abilities.abilities.Ability"):
+                if member[0] in BASE_CLASSES:
+                    continue
+                else:
+                    # Add to all abilities
+                    key = (member[1].key if isinstance(member[1].key, str) else member[0])
+                    registry[key] = member[1]
+    return dict(sorted(registry.items()))
+
 
-ALL_ABILITIES = dict(sorted(ALL_ABILITIES.items()))
-HEALING_ABILITIES = dict(sorted(HEALING_ABILITIES.items()))
+def all_abilities():
+    """Return the {key: ability class} registry, building it the first time it's needed."""
+    global _registry, _index
+    if _registry is None:
+        _registry = _build_registry()
+        _index = PrefixIndex(_registry.items())
+    return _registry
 
 
 def get(inpt):
-    for ability_name in ALL_ABILITIES:
-        if ability_name.lower().startswith(inpt.lower()):
-            return ALL_ABILITIES[ability_name]
+    """Return the first ability class whose key starts with the input, or None."""
+    all_abilities()
+    return _index.first(inpt)
+
+
+def find_known(caster, inpt):
+    """
+    Return all of a caster's learned abilities whose key starts with the input.
+
+    The caster's index is kept in ndb, and only built from their ability list the first
+    time after a reload or after abilities_changed() is called.
+    """
+    index = caster.ndb.ability_index
+    if index is None:
+        index = PrefixIndex((ability.key, ability) for ability in caster.db.abilities or [] if ability)
+        caster.ndb.ability_index = index
+    return index.find(inpt)
+
+
+def abilities_changed(caster):
+    """Call after an ability is learned, taught or removed."""
+    caster.ndb.ability_index = None
@@ -231,11 +231,12 @@ class SpinningAssault(Ability):
         for damage_type in weapon_damage:
             ability_damage[damage_type] = weapon_damage[damage_type] // 2
 
-        turn_handler = caster.db.combat_turnhandler
-        for fighter in turn_handler.db.fighters:
-            if turn_handler.db.grid.distance(caster, fighter) == 1:
-                # Without setting attack_landed, the damage still has a chance to be avoided
-                COMBAT.resolve_attack(attacker=caster, defender=fighter, attack=self, damage_values=ability_damage)
+        grid = caster.db.combat_turnhandler.db.grid
+        x, y = caster.db.combat_x, caster.db.combat_y
+        adjacent = [(x + dx, y + dy) for dx, dy in combat_grid.DIRECTIONS.values()]
+        # Without setting attack_landed, the damage still has a chance to be avoided
+        COMBAT.resolve_area_attack(attacker=caster, defenders=grid.occupants_in(adjacent, exclude=caster), attack=self,
+                                   damage_values=ability_damage)
 
 
 class Stab(Ability):
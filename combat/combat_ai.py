@@ -7,6 +7,7 @@ from combat.abilities.all_abilities import HEALING_ABILITIES
 from combat.combat_constants import DIRECTION_NAMES_OPPOSITES
 from combat.combat_grid import DIRECTIONS
 from combat.combat_handler import COMBAT
+from server.timings import COMBAT_TIMINGS
 from typeclasses.inanimate.items.item_types.usables import Usable
 from typeclasses.scripts.scripts import Script
 
@@ -29,6 +30,7 @@ class CombatAI(Script):
                 # If we can successfully attack, stop there
                 COMBAT.start_join_fight(attacker=self.obj, target=content, action=self.obj.get_weapon())
 
+    @COMBAT_TIMINGS.timed("ai_take_turn")
     def take_turn(self):
         """While the entity has AP remaining, choose and perform an action. This repeats until perform_action() stops
         calling it back and it returns."""
@@ -116,6 +118,7 @@ class CombatAI(Script):
         else:
             return entity
 
+    @COMBAT_TIMINGS.timed("ai_perform_action")
     def perform_action(self, action, target=None):
         """Interpret the action choice, perform it, and continue the turn if able."""
         entity = self.obj
@@ -263,6 +263,23 @@ class CombatGrid(Script):
                 effects_here.append(effect)
         return effects_here
 
+    def occupants_in(self, tiles, exclude=None):
+        """
+        Return every object occupying the given tiles, reading each tile straight from the grid dictionary rather than
+        checking each fighter's position.
+
+        :param tiles: An iterable of coordinate tuples, i.e. from tile_effects.get_tiles.
+        :param exclude: (optional) An object to leave out, i.e. the caster.
+        :return: List of occupants, in the order their tiles were given.
+        """
+        grid = self.db.grid
+        occupants = []
+        for tile in tiles:
+            occupant = grid.get(tuple(tile), 0)
+            if occupant and occupant != exclude and occupant not in occupants:
+                occupants.append(occupant)
+        return occupants
+
     def find_available_square(self, obj=None, origin_x=None, origin_y=None, exclude=None):
         """
         Find one of the nearest empty squares relative to the given coordinates.
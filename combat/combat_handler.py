@@ -1,15 +1,14 @@
 import math
 from random import randint
-from decimal import Decimal as Dec
 
 from evennia.utils import inherits_from
 from evennia.utils.create import create_script
 
-from combat.combat_constants import RAIN_FIRE_DMG_REDUCTION, SECS_PER_TURN
+from combat.combat_constants import RAIN_FIRE_DMG_REDUCTION
 from combat.combat_constants import DamageTypes
-from combat.effects import Poisoned
-from server import appearance
+from combat import effect_hooks
 from server.appearance import dmg_color
+from server.timings import COMBAT_TIMINGS
 from stats.stats_constants import PERCEPT_TO_ACCURACY_BONUS
 from typeclasses.scripts.weather import RAINING
 
@@ -45,11 +44,8 @@ class CombatHandler:
                 here.db.combat_turnhandler.add_to_fight(target)
 
     def at_post_move(self, entity):
-        if entity.effect_active("Bleeding"):
-            amount = int(entity.get_max("HP") / 20)
-            entity.apply_damage({None: amount})  # 5% max health damage from bleeding
-            entity.location.msg_contents(f"{entity.get_display_name(capital=True)} takes {appearance.dmg_color(entity)}"
-                                         f"{amount} damage|n from bleeding!")
+        for hook in effect_hooks.hooks_for(entity, effect_hooks.ON_MOVE):
+            hook(self, entity)
 
     def get_ap(self, character):
         """
@@ -109,6 +105,7 @@ class CombatHandler:
         else:
             return True
 
+    @COMBAT_TIMINGS.timed("get_accuracy")
     def get_accuracy(self, attacker, defender):
         """
         Returns an accuracy for an attack, applying only the attacker's stat modifications to a hitroll.
@@ -155,6 +152,7 @@ class CombatHandler:
         attacker.location.more_info(f"{accuracy} to hit ({attacker.name})")
         return accuracy
 
+    @COMBAT_TIMINGS.timed("hit_successful")
     def hit_successful(self, attacker=None, defender=None, accuracy=None, evasion_value=None):
         """
         Determines whether an attack successfully lands. Either attacker/defender or accuracy/evasion must be provided.
@@ -186,6 +184,7 @@ class CombatHandler:
             attacker.location.more_info(f"{accuracy} hit > {evasion_value} evasion (success)")
             return True
 
+    @COMBAT_TIMINGS.timed("apply_damage_amt_effects")
     def apply_damage_amt_effects(self, attacker, defender, damage_values):
         """
         Applies to the given damage_values any effects on the attacker, defender, or environment that increase or
@@ -199,12 +198,27 @@ class CombatHandler:
         Returns:
             Adjusted damage values to pass to the defender's get_damage_taken method.
         """
+        damage_values = self.apply_attacker_damage_effects(attacker, damage_values)
+        return self.apply_defender_damage_effects(defender, damage_values)
+
+    @COMBAT_TIMINGS.timed("apply_attacker_damage_effects")
+    def apply_attacker_damage_effects(self, attacker, damage_values):
+        """
+        Applies the environment's and attacker's damage effects, which are the same for every defender of an attack.
+
+        Args:
+            attacker (CombatEntity): Entity attacking
+            damage_values: The damage values calculated from the hit.
+
+        Returns:
+            Adjusted damage values.
+        """
         # Apply environment effects
         if DamageTypes.FIRE in damage_values:
-            if defender.location.zone().db.current_weather == RAINING:
+            if attacker.location.zone().db.current_weather == RAINING:
                 original_dmg = damage_values[DamageTypes.FIRE]
                 damage_values[DamageTypes.FIRE] = int(damage_values[DamageTypes.FIRE] * RAIN_FIRE_DMG_REDUCTION)
-                defender.location.more_info(f"{math.ceil(RAIN_FIRE_DMG_REDUCTION * 100)}% fire damage due to rain = "
+                attacker.location.more_info(f"{math.ceil(RAIN_FIRE_DMG_REDUCTION * 100)}% fire damage due to rain = "
                                             f"{original_dmg} to {damage_values[DamageTypes.FIRE]} dmg")
 
         # Apply attacker's relevant effects
@@ -226,7 +240,20 @@ class CombatHandler:
                 except KeyError:
                     damage_values[damage_type] = effect_amt
 
-        # Apply defender's relevant effects
+        return damage_values
+
+    @COMBAT_TIMINGS.timed("apply_defender_damage_effects")
+    def apply_defender_damage_effects(self, defender, damage_values):
+        """
+        Applies the defender's own effects that increase or decrease the damage they take.
+
+        Args:
+            defender (CombatEntity): Entity being attacked
+            damage_values: The damage values, already adjusted by the attacker's effects.
+
+        Returns:
+            Adjusted damage values to pass to the defender's get_damage_taken method.
+        """
         if defender.effect_active("Knocked Down"):  # If defender knocked down, add 50% to damage
             defender.location.more_info("+50% damage (Knocked Down)")
             for damage_type in damage_values:
@@ -234,6 +261,7 @@ class CombatHandler:
 
         return damage_values
 
+    @COMBAT_TIMINGS.timed("get_damage_taken")
     def get_damage_taken(self, defender, damage_values):
         """
         Apply defense and resistance to determine the damage that is actually taken by the defender.
@@ -278,6 +306,30 @@ class CombatHandler:
 
         return damage_values
 
+    def damage_string(self, defender, damage_values):
+        """
+        Craft a grammatically accurate one-line list of damages, i.e. "5 blunt, 3 piercing, and 2 fire damage".
+
+        Args:
+            defender (CombatEntity): Entity taking the damage, to color the damage by.
+            damage_values: The damage that was actually taken by the defender.
+
+        Returns:
+            The colored damage list, ending in " damage".
+        """
+        color = dmg_color(defender)
+        parts = []
+        for damage_type in damage_values:
+            type_name = " " + damage_type.get_display_name() if damage_type else ""
+            parts.append(f"{color}{damage_values[damage_type]}{type_name}|n")
+
+        if len(parts) > 2:
+            listed = ", ".join(parts[:-1]) + ", and " + parts[-1]
+        else:
+            listed = " and ".join(parts)
+        return listed + f"{color} damage|n"
+
+    @COMBAT_TIMINGS.timed("announce_damage")
     def announce_damage(self, attacker, defender, damage_values, attack_name=None, msg=None):
         """
         Announce the strike or miss of an attack, and the damages dealt on a strike, to everyone in the room.
@@ -290,26 +342,11 @@ class CombatHandler:
             msg: Optional replacement message up to "x damage!" that different abilities can specify
         """
         if bool(damage_values):  # If any damages are > 0
-            # Craft grammatically accurate one-line list of damages i.e. "5 blunt, 3 piercing, and 2 fire damage!"
             if not msg:
                 msg = "%s's %s strikes %s for " % (
                     attacker.get_display_name(capital=True, article=False), attack_name,
                     defender.get_display_name(article=True))
-            for i, damage_type in enumerate(damage_values):
-                if i == len(damage_values) - 1 and len(damage_values) > 1:  # If at the last damage type to list
-                    # Precede with " and "
-                    if msg[-1] != " ":
-                        msg = msg + " "
-                    msg = msg + "and "
-                elif len(damage_values) > 2:  # Else if there are more to list
-                    # Follow with a comma
-                    msg = msg + ", "
-                # Add damage amount and type to message
-                type_name = " " + damage_type.get_display_name() if damage_type else ""
-                msg = msg + f"{dmg_color(defender)}{damage_values[damage_type]}{type_name}|n"
-            # End with " damage!"
-            msg = msg + f"{dmg_color(defender)} damage!|n"
-            attacker.location.msg_contents(msg)
+            attacker.location.msg_contents(msg + self.damage_string(defender, damage_values) + "!")
 
         else:  # No damage dealt
             attacker.location.msg_contents(
@@ -318,6 +355,65 @@ class CombatHandler:
                     defender.get_display_name(article=True))
             )
 
+    @COMBAT_TIMINGS.timed("announce_area_damage")
+    def announce_area_damage(self, attacker, results, attack_name, msg=None):
+        """
+        Announce the outcome of an area attack on every defender in one message.
+
+        Args:
+            attacker (CombatEntity): Entity attacking.
+            results (dict): {defender: (landed, damage_values)} as returned by resolve_area_attack.
+            attack_name: String name of the attack being used.
+            msg: Optional replacement for the opening "X's attack" part of the message.
+        """
+        struck, bounced, missed = [], [], []
+        for defender, (landed, damage_values) in results.items():
+            name = defender.get_display_name(article=True)
+            if not landed:
+                missed.append(name)
+            elif damage_values:
+                struck.append(f"{name} for {self.damage_string(defender, damage_values)}")
+            else:
+                bounced.append(name)
+
+        clauses = []
+        if struck:
+            clauses.append("strikes " + ", ".join(struck))
+        if bounced:
+            clauses.append("bounces harmlessly off " + ", ".join(bounced))
+        if missed:
+            clauses.append("misses " + ", ".join(missed))
+
+        if not msg:
+            msg = "%s's %s" % (attacker.get_display_name(capital=True, article=False), attack_name)
+        attacker.location.msg_contents(f"{msg} {"; ".join(clauses)}!")
+
+    @COMBAT_TIMINGS.timed("get_base_damage")
+    def get_base_damage(self, attacker, attack):
+        """Roll the damage an attack deals before any effects, defense, or resistance."""
+        # If attacking with weapon or unarmed
+        if (inherits_from(attack, "typeclasses.inanimate.items.item_types.equipment.weapons.Weapon")
+                or isinstance(attack, str)):
+            return attacker.get_weapon_damage()
+        # Else attacking with ability
+        else:
+            return attack.get_damage(attacker)
+
+    @COMBAT_TIMINGS.timed("post_attack_effects")
+    def apply_post_attack_effects(self, attacker, defender, total_damage):
+        """Apply the attacker's and defender's effects that trigger once an attack has landed."""
+        if (defender.attributes.has("rpg_class") and defender.db.rpg_class
+                and defender.db.rpg_class.__name__ == "Monk" and defender.db.combat_lastaction == "pass"):
+            attacker.location.msg_contents(f"{defender.get_display_name(capital=True)} counterattacks!")
+            defender.attack(attacker)
+
+        # Only run the hooks for effects the fighters actually have
+        for hook in effect_hooks.hooks_for(defender, effect_hooks.ON_HIT):
+            hook(self, attacker, defender, total_damage)
+        for hook in effect_hooks.hooks_for(attacker, effect_hooks.ON_ATTACK):
+            hook(self, attacker, defender, total_damage)
+
+    @COMBAT_TIMINGS.timed("resolve_attack")
     def resolve_attack(
             self,
             attacker,
@@ -351,13 +447,7 @@ class CombatHandler:
                """
         def get_damage_values(damage_values):
             if not damage_values:
-                # If attacking with weapon or unarmed
-                if (inherits_from(attack, "typeclasses.inanimate.items.item_types.equipment.weapons.Weapon")
-                        or isinstance(attack, str)):
-                    damage_values = attacker.get_weapon_damage()
-                # Else attacking with ability
-                else:
-                    damage_values = attack.get_damage(attacker)
+                damage_values = self.get_base_damage(attacker, attack)
 
             damage_values = self.apply_damage_amt_effects(attacker, defender, damage_values)
             damage_values = self.get_damage_taken(defender, damage_values)
@@ -368,80 +458,6 @@ class CombatHandler:
 
             return damage_values, total_damage
 
-        def apply_post_attack_effects():
-            if (defender.attributes.has("rpg_class") and defender.db.rpg_class
-                    and defender.db.rpg_class.__name__ == "Monk" and defender.db.combat_lastaction == "pass"):
-                attacker.location.msg_contents(f"{defender.get_display_name(capital=True)} counterattacks!")
-                defender.attack(attacker)
-
-            if defender.effect_active("Retaliation"):
-                effect = defender.db.effects["Retaliation"]
-                retal_damage = self.get_damage_taken(attacker, {effect["damage_type"]: effect["amount"]})
-                attacker.apply_damage(retal_damage)
-                defender.location.msg_contents(f"{attacker.get_display_name(capital=True)} takes "
-                                               f"{retal_damage[effect["damage_type"]]} damage from "
-                                               f"{defender.get_display_name()}'s {appearance.effect}Retaliation|n!")
-
-            if attacker.effect_active("Cursed"):
-                amount = attacker.db.effects["Cursed"]["amount"]
-                attacker.apply_damage({DamageTypes.ARCANE: amount})
-                attacker.location.msg_contents(f"{attacker.get_display_name(capital=True)} takes {amount} damage from "
-                                               f"their curse!")
-
-            if attacker.effect_active("Bleeding"):
-                amount = int(attacker.get_max("HP") / 20)  # 5% max health damage from bleeding
-                attacker.location.msg_contents(f"apply post attack effects")
-                attacker.apply_damage({None: amount})
-                attacker.location.msg_contents(f"{attacker.get_display_name(capital=True)} takes "
-                                               f"{appearance.dmg_color(attacker)}{amount} damage|n from bleeding!")
-
-            if attacker.effect_active("Poison Chance"):
-                percent_chance = attacker.db.effects["Poison Chance"]["amount"]
-                if randint(0, 100) < percent_chance:
-                    # 1-2% hp per second
-                    max_hp = Dec(defender.get_max("hp"))
-                    min_dmg = int(math.ceil(Dec(.01) * max_hp))
-                    max_dmg = int(math.ceil(Dec(.02) * max_hp))
-
-                    defender.add_effect(typeclass=Poisoned, attributes=[
-                    ("duration", 3 * int(SECS_PER_TURN)),
-                    ("range", (min_dmg, max_dmg)),
-                    ("source", attacker.search("poison blade"))]) # This will have to change if other sources are added
-
-            if attacker.effect_active("Siphon HP"):
-                siphoned = int(total_damage / 3)
-                attacker.db.hp += siphoned
-                attacker.location.msg_contents(f"{attacker.get_display_name(capital=True)} siphons {siphoned} HP from "
-                                               f"{defender.get_display_name()}!")
-                attacker.cap_stats()
-
-            if attacker.effect_active("Siphon Mana"):
-                siphoned = int(total_damage / 2)
-                attacker.db.mana += siphoned
-                attacker.location.msg_contents(
-                    f"{attacker.get_display_name(capital=True)} siphons {siphoned} mana from "
-                    f"{defender.get_display_name()}!")
-                attacker.cap_stats()
-
-            if attacker.effect_active("Siphon Stamina"):
-                siphoned = int(total_damage / 2)
-                if attacker.db.stamina < siphoned:
-                    if attacker.db.stamina == 0:
-                        attacker.location.msg_contents(
-                            f"{defender.get_display_name(capital=True)} doesn't have enough stamina to siphon!")
-                    else:
-                        siphoned = defender.db.stamina
-                        defender.db.stamina = 0
-                        attacker.db.stamina += siphoned
-                else:
-                    defender.db.stamina -= siphoned
-                    attacker.db.stamina += siphoned
-                attacker.location.msg_contents(
-                    f"{attacker.get_display_name(capital=True)} siphons {siphoned} stamina from "
-                    f"{defender.get_display_name()}!")
-                attacker.cap_stats()
-                defender.cap_stats()
-
         # Extract attack name
         if isinstance(attack, str):
             attack_name = attack
@@ -469,10 +485,67 @@ class CombatHandler:
             defender.apply_damage(damage_values)
 
         # Apply post-attack effects
-        apply_post_attack_effects()
+        self.apply_post_attack_effects(attacker, defender, total_damage)
 
         return attack_landed, damage_values
 
+    @COMBAT_TIMINGS.timed("resolve_area_attack")
+    def resolve_area_attack(self, attacker, defenders, attack, damage_values=None, announce_msg=None,
+                            attack_landed=False):
+        """
+        Resolves one attack against every defender in an area at once. The hitroll, base damage, and the attacker's
+        and environment's damage effects are calculated a single time for the whole area; only evasion, defense,
+        resistance and the defender's own effects are looked up per defender. The outcome is announced in one message.
+
+        Args:
+            attacker (CombatEntity): Entity attacking
+            defenders (list): Entities caught in the area, i.e. from CombatGrid.occupants_in
+            attack: The weapon object, ability/spell object, or name of unarmed attack being used
+
+        Options:
+            damage_values (dict): Override for damage values. Default will use weapon.get_weapon_damage or
+                ability.get_damage
+            announce_msg (str): Replacement for the opening "X's attack" of the combined announcement
+            attack_landed (bool): Skip the hit check, landing on every defender
+
+        Returns:
+            Dict of {defender: (landed, damage_values)} for every defender given.
+        """
+        if not defenders:
+            return {}
+
+        if isinstance(attack, str):
+            attack_name = attack
+        else:
+            attack_name = attack.get_display_name(article=False)
+
+        # Roll once for the whole area
+        accuracy = None if attack_landed else self.get_accuracy(attacker, None)
+        if not damage_values:
+            damage_values = self.get_base_damage(attacker, attack)
+        damage_values = self.apply_attacker_damage_effects(attacker, dict(damage_values))
+
+        # Then check each defender against the shared roll
+        results = {}
+        for defender in defenders:
+            if not attack_landed and not self.hit_successful(attacker, defender, accuracy):
+                results[defender] = (False, {})
+                continue
+            defender_values = self.apply_defender_damage_effects(defender, dict(damage_values))
+            defender_values = self.get_damage_taken(defender, defender_values)
+            results[defender] = (True, {key: value for key, value in defender_values.items() if value > 0})
+
+        self.announce_area_damage(attacker, results, attack_name, msg=announce_msg)
+
+        for defender, (landed, defender_values) in results.items():
+            if not landed:
+                continue
+            if bool(defender_values):
+                defender.apply_damage(defender_values)
+            self.apply_post_attack_effects(attacker, defender, sum(defender_values.values()))
+
+        return results
+
     # ITEM RULES
 
 
@@ -0,0 +1,168 @@
+"""
+Callbacks for effects that react to combat events, keyed by effect key.
+
+An entity's effects attribute already holds an entry for every effect currently applied to it (written when the
+effect is added and removed when its script is deleted), so it serves as that entity's hook table: the combat handler
+only runs the hooks registered for effect keys actually present there, rather than probing for every effect that
+might react on every attack or move. New effects can react to these events by registering a function here.
+
+Hook signatures:
+    on_hit(handler, attacker, defender, total_damage) - the entity with the effect was hit
+    on_attack(handler, attacker, defender, total_damage) - the entity with the effect landed an attack
+    on_move(handler, entity) - the entity with the effect moved on the combat grid
+"""
+import math
+from decimal import Decimal as Dec
+from random import randint
+
+from combat.combat_constants import SECS_PER_TURN, DamageTypes
+from combat.effects import Poisoned
+from server import appearance
+
+ON_HIT = {}
+ON_ATTACK = {}
+ON_MOVE = {}
+
+# Hooks that can defeat the entity with the effect, which ends its timed effects
+_CAN_DEFEAT = set()
+
+
+def _register(table, effect_key, can_defeat):
+    def decorator(func):
+        table[effect_key] = func
+        if can_defeat:
+            _CAN_DEFEAT.add(func)
+        return func
+
+    return decorator
+
+
+def on_hit(effect_key, can_defeat=False):
+    return _register(ON_HIT, effect_key, can_defeat)
+
+
+def on_attack(effect_key, can_defeat=False):
+    return _register(ON_ATTACK, effect_key, can_defeat)
+
+
+def on_move(effect_key, can_defeat=False):
+    return _register(ON_MOVE, effect_key, can_defeat)
+
+
+def hooks_for(entity, table):
+    """
+    Yield the hooks in the given table for effects currently on the entity, in the order they're defined below.
+
+    The entity's effects are read once, and only read again after a hook that can defeat the entity, since defeat ends
+    its timed effects and their hooks shouldn't run.
+    """
+    effects = entity.db.effects
+    if not effects:
+        return
+    for effect_key in [effect_key for effect_key in table if effect_key in effects]:
+        if effect_key not in effects:  # Ended by an earlier hook
+            continue
+        hook = table[effect_key]
+        yield hook
+        if hook in _CAN_DEFEAT:
+            effects = entity.db.effects or {}
+
+
+# <editor-fold desc="On hit">
+@on_hit("Retaliation")
+def retaliation(handler, attacker, defender, total_damage):
+    effect = defender.db.effects["Retaliation"]
+    retal_damage = handler.get_damage_taken(attacker, {effect["damage_type"]: effect["amount"]})
+    attacker.apply_damage(retal_damage)
+    defender.location.msg_contents(f"{attacker.get_display_name(capital=True)} takes "
+                                   f"{retal_damage[effect["damage_type"]]} damage from "
+                                   f"{defender.get_display_name()}'s {appearance.effect}Retaliation|n!")
+
+
+# </editor-fold>
+
+# <editor-fold desc="On attack">
+@on_attack("Cursed", can_defeat=True)
+def cursed(handler, attacker, defender, total_damage):
+    amount = attacker.db.effects["Cursed"]["amount"]
+    attacker.apply_damage({DamageTypes.ARCANE: amount})
+    attacker.location.msg_contents(f"{attacker.get_display_name(capital=True)} takes {amount} damage from "
+                                   f"their curse!")
+
+
+@on_attack("Bleeding", can_defeat=True)
+def bleeding_on_attack(handler, attacker, defender, total_damage):
+    bleed(attacker)
+
+
+@on_attack("Poison Chance")
+def poison_chance(handler, attacker, defender, total_damage):
+    percent_chance = attacker.db.effects["Poison Chance"]["amount"]
+    if randint(0, 100) < percent_chance:
+        # 1-2% hp per second
+        max_hp = Dec(defender.get_max("hp"))
+        min_dmg = int(math.ceil(Dec(.01) * max_hp))
+        max_dmg = int(math.ceil(Dec(.02) * max_hp))
+
+        defender.add_effect(typeclass=Poisoned, attributes=[
+            ("duration", 3 * int(SECS_PER_TURN)),
+            ("range", (min_dmg, max_dmg)),
+            ("source", attacker.search("poison blade"))])  # This will have to change if other sources are added
+
+
+@on_attack("Siphon HP")
+def siphon_hp(handler, attacker, defender, total_damage):
+    siphoned = int(total_damage / 3)
+    attacker.db.hp += siphoned
+    attacker.location.msg_contents(f"{attacker.get_display_name(capital=True)} siphons {siphoned} HP from "
+                                   f"{defender.get_display_name()}!")
+    attacker.cap_stats()
+
+
+@on_attack("Siphon Mana")
+def siphon_mana(handler, attacker, defender, total_damage):
+    siphoned = int(total_damage / 2)
+    attacker.db.mana += siphoned
+    attacker.location.msg_contents(
+        f"{attacker.get_display_name(capital=True)} siphons {siphoned} mana from "
+        f"{defender.get_display_name()}!")
+    attacker.cap_stats()
+
+
+@on_attack("Siphon Stamina")
+def siphon_stamina(handler, attacker, defender, total_damage):
+    siphoned = int(total_damage / 2)
+    if attacker.db.stamina < siphoned:
+        if attacker.db.stamina == 0:
+            attacker.location.msg_contents(
+                f"{defender.get_display_name(capital=True)} doesn't have enough stamina to siphon!")
+        else:
+            siphoned = defender.db.stamina
+            defender.db.stamina = 0
+            attacker.db.stamina += siphoned
+    else:
+        defender.db.stamina -= siphoned
+        attacker.db.stamina += siphoned
+    attacker.location.msg_contents(
+        f"{attacker.get_display_name(capital=True)} siphons {siphoned} stamina from "
+        f"{defender.get_display_name()}!")
+    attacker.cap_stats()
+    defender.cap_stats()
+
+
+# </editor-fold>
+
+# <editor-fold desc="On move">
+@on_move("Bleeding", can_defeat=True)
+def bleeding_on_move(handler, entity):
+    bleed(entity)
+
+
+# </editor-fold>
+
+
+def bleed(entity):
+    amount = int(entity.get_max("HP") / 20)  # 5% max health damage from bleeding
+    entity.apply_damage({None: amount})
+    entity.location.msg_contents(f"{entity.get_display_name(capital=True)} takes {appearance.dmg_color(entity)}"
+                                 f"{amount} damage|n from bleeding!")
@@ -8,6 +8,7 @@ from combat.combat_grid import CombatGrid
 from combat.combat_handler import COMBAT
 from combat.effects import DurationEffect
 from server import appearance
+from server.timings import COMBAT_TIMINGS
 from typeclasses.scripts.scripts import Script
 
 
@@ -198,6 +199,7 @@ class TurnHandler(Script):
         # Initialize the character like you do at the start.
         self.initialize_for_combat(character)
 
+    @COMBAT_TIMINGS.timed("start_turn")
     def start_turn(self, character):
         """
         Readies a character for the start of their turn by replenishing their available actions, regenerating their
@@ -1,7 +1,7 @@
 from evennia.commands.cmdset import CmdSet
 from evennia.commands.default.account import CmdIC, CmdOOC
-from evennia.commands.default.muxcommand import MuxCommand
 
+from commands.command import MuxCommand
 from server import appearance
 
 
@@ -1,12 +1,13 @@
 from evennia import default_cmds
-from evennia.commands.command import Command
 from evennia.commands.default.help import CmdHelp
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.utils import inherits_from
 
+from combat.abilities import all_abilities
 from combat.combat_handler import COMBAT
+from commands.command import Command, MuxCommand
 from server import appearance
 from typeclasses.inanimate.items.item_types.usables import Consumable
+from world.locations.exit_graph import EXIT_GRAPH
 
 
 class CmdAttack(Command):
@@ -129,10 +130,7 @@ class CmdCast(MuxCommand):
                 return
 
         # Find ability/spell by name
-        valid_castables = []
-        for ability in self.caller.db.abilities:
-            if ability.key.lower().startswith(ability_string.lower()):
-                valid_castables.append(ability)
+        valid_castables = all_abilities.find_known(self.caller, ability_string)
         if len(valid_castables) == 0:
             self.caller.msg("No valid abilities found for " + ability_string)
             return
@@ -210,12 +208,10 @@ class DirCmd(MuxCommand):
     def func(self):
         # Out of combat
         if not self.caller.is_in_combat():
-            found_exit = False
-            for ext in self.caller.location.exits:
-                if self.key == ext.key:
-                    self.caller.move_to(destination=ext, move_type="traverse")
-                    found_exit = True
-            if not found_exit:
+            edge = EXIT_GRAPH.edge(self.caller.location, self.key)
+            if edge:
+                self.caller.move_to(destination=EXIT_GRAPH.get(edge.exit), move_type="traverse")
+            else:
                 self.caller.msg("You can't go that way.")
         # In combat
         else:
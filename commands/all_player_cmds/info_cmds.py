@@ -1,14 +1,13 @@
 from collections import defaultdict
 from itertools import chain
 
-from evennia.commands.command import Command
 from evennia.commands.cmdset import CmdSet
 from evennia.commands.default.help import CmdHelp, HelpCategory
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.help.utils import help_search_with_index, parse_entry_for_subcategories
 from evennia.utils import inherits_from
 from evennia.utils.evtable import EvTable
 
+from commands.command import Command, MuxCommand
 from server import appearance
 from world.quests.quest import quest_desc, get_quest, get_stage
 from world.quests.quest_hooks import location_string, print_dialogue_options
@@ -1,7 +1,11 @@
-from evennia.commands.command import Command
+import evennia
 from evennia.commands.cmdset import CmdSet
+from evennia.utils import inherits_from
+from evennia.utils.containers import GLOBAL_SCRIPTS
 
+from commands.command import Command
 from typeclasses.inanimate.portals import Portal, PORTAL_KEY_TO_ROOM
+from world.locations import routes
 
 
 class CmdTravel(Command):
@@ -49,6 +53,86 @@ class CmdTravel(Command):
                 self.caller.execute_cmd("look")
 
 
+class CmdWalk(Command):
+    """
+        walk to another room or area
+
+        Usage:
+          walk <room or area name>
+          walk to <room or area name>
+          walk stop
+
+        Walk one room at a time along the shortest way to the named room,
+        or to the nearest room of the named area. You stop walking if
+        anything else moves you, a fight starts, or the way is blocked.
+        """
+    key = "walk"
+    help_category = "navigation"
+
+    def find_route(self):
+        """Returns the route to the room or area named in the args, or None after messaging the caller why not."""
+        name = self.args.strip()
+        if name.lower().startswith("to "):
+            name = name[3:].strip()
+        if not name:
+            self.caller.msg(f"Usage: {self.key} <room or area name>")
+            return None
+
+        location = GLOBAL_SCRIPTS.get(name)
+        if location and inherits_from(location, "world.locations.areas.Area"):
+            goals = location.db.rooms
+        else:
+            goals = evennia.search_object(name, typeclass="world.locations.rooms.Room")
+        if not goals:
+            self.caller.msg(f"No room or area called '{name}'.")
+            return None
+
+        route = routes.find_route(self.caller.location, goals)
+        if route is None:
+            self.caller.msg(f"You don't know a way to {name} from here.")
+        elif not route:
+            self.caller.msg("You're already there!")
+            return None
+        return route
+
+    def func(self):
+        if self.args.strip().lower() == "stop":
+            if routes.stop_walk(self.caller):
+                self.caller.msg("You stop walking.")
+            else:
+                self.caller.msg("You aren't walking anywhere.")
+            return
+        if self.caller.is_in_combat():
+            self.caller.msg("You can't walk away from a fight!")
+            return
+
+        route = self.find_route()
+        if route:
+            self.caller.msg(f"You start walking {route[0][0]} ({len(route)} rooms away).")
+            routes.start_walk(self.caller, route)
+
+
+class CmdRoute(CmdWalk):
+    """
+        show the way to another room or area
+
+        Usage:
+          route <room or area name>
+
+        List the directions to take to get from here to the named room,
+        or to the nearest room of the named area.
+        """
+    key = "route"
+    help_category = "navigation"
+
+    def func(self):
+        route = self.find_route()
+        if route:
+            self.caller.msg(f"|w{len(route)} rooms away:|n {", ".join(direction for direction, _, _ in route)}")
+
+
 class InteractionCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdTravel)
+        self.add(CmdWalk)
+        self.add(CmdRoute)
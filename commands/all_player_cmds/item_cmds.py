@@ -1,6 +1,6 @@
-from evennia.commands.command import Command
 from evennia.commands.cmdset import CmdSet
 
+from commands.command import Command
 from server import appearance
 from typeclasses.inanimate.items.items import Item
 
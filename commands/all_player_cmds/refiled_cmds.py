@@ -1,4 +1,7 @@
-"""These commands have only had their category in the help table changed from default Evennia commands."""
+"""
+These commands have mostly only had their category in the help table changed from default Evennia commands. The
+set command also tells the room when it changes how something in it is described.
+"""
 
 from evennia.commands.cmdset import CmdSet
 from evennia.commands.default.account import CmdColorTest, CmdQuit, CmdSessions, CmdStyle, CmdWho, CmdPassword, CmdOOC, \
@@ -80,6 +83,22 @@ class MyCmdOpenDoor(CmdOpenCloseDoor):
 class MyCmdSet(CmdSetAttribute):
     help_category = "data"
 
+    def set_attr(self, obj, attr, value, category):
+        result = super().set_attr(obj, attr, value, category)
+        try:
+            obj.appearance_changed()
+        except AttributeError:
+            pass
+        return result
+
+    def rm_attr(self, obj, attr, category):
+        result = super().rm_attr(obj, attr, category)
+        try:
+            obj.appearance_changed()
+        except AttributeError:
+            pass
+        return result
+
 class MyCmdExamine(CmdExamine):
     help_category = "data"
 
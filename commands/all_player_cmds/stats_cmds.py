@@ -1,12 +1,11 @@
-from evennia.commands.command import Command
 from evennia.commands.cmdset import CmdSet
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.utils.create import create_object
 from evennia.utils.evtable import EvTable
 
 from combat.abilities import all_abilities
 from combat.abilities.spells import Spell
 from combat.combat_constants import DamageTypes
+from commands.command import Command, MuxCommand
 from server import appearance
 from stats.char_stats import xp_remaining, xp_threshold, level_up, spend_attribute_points
 from typeclasses.living.characters import Trainer
@@ -207,6 +206,7 @@ class CmdLearn(MuxCommand):
         # Create and add ability
         obj = create_object(typeclass=type(target_ability), key=target_ability.key, location=self.caller)
         self.caller.db.abilities.append(obj)
+        all_abilities.abilities_changed(self.caller)
         self.caller.msg(f"{trainer.name} teaches you to use {obj.get_display_name()}!")
 
         # Deduct cost
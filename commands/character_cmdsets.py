@@ -13,6 +13,7 @@ from commands.perm_cmds.cheat_cmds import CheatCmdSet
 from commands.perm_cmds.game_data_cmds import GameDataCmdSet
 from commands.perm_cmds.location_data_cmds import LocationCmdSet
 from commands.perm_cmds.object_data_cmds import ObjectDataCmdSet
+from commands.perm_cmds.perf_cmds import PerfCmdSet
 from commands.perm_cmds.questbuild_cmds import QuestBuildCmdSet
 from typeclasses.inanimate.items.item_types.containers import ContainerCmdSet
 from typeclasses.inanimate.items.item_types.equipment.equipment import EquipmentCharacterCmdSet
@@ -46,5 +47,6 @@ class PlayerCmdSet(CmdSet):
         self.add(QuestBuildCmdSet)
         self.add(ObjectDataCmdSet)
         self.add(CheatCmdSet)
+        self.add(PerfCmdSet)
 
 
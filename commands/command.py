@@ -4,10 +4,50 @@ Commands
 Commands describe the input the account can do to the game.
 
 """
+from time import perf_counter
+
+from django.conf import settings
 from evennia.commands.command import Command as BaseCommand
+from evennia.commands.default.muxcommand import MuxCommand as BaseMuxCommand
+from evennia.utils import logger
 
+from server.timings import COMMAND_TIMINGS
 from typeclasses.base.objects import Object
-class Command(BaseCommand):
+
+# Commands taking longer than this many seconds (parse and func together) are logged
+SLOW_COMMAND_THRESHOLD = getattr(settings, "SLOW_COMMAND_THRESHOLD", 0.1)
+
+
+class CommandTimingMixin:
+    """
+    Times parse() and func() for every command, recording them under the command's key in COMMAND_TIMINGS (see
+    @perf), and logs any command slower than SLOW_COMMAND_THRESHOLD.
+    """
+
+    def at_pre_cmd(self):
+        self._parse_start = perf_counter()
+        self._func_start = None
+        return super().at_pre_cmd()
+
+    def parse(self):
+        super().parse()
+        self._func_start = perf_counter()
+
+    def at_post_cmd(self):
+        super().at_post_cmd()
+        start = getattr(self, "_parse_start", None)
+        if start is None:
+            return
+        end = perf_counter()
+        func_start = self._func_start or start
+        COMMAND_TIMINGS.add(f"{self.key} (parse)", func_start - start)
+        COMMAND_TIMINGS.add(self.key, end - start)
+        if end - start > SLOW_COMMAND_THRESHOLD:
+            logger.log_warn(f"Slow command: '{self.cmdstring} {self.args}' by {self.caller} took "
+                            f"{(end - start) * 1000:.1f}ms (parse {(func_start - start) * 1000:.1f}ms)")
+
+
+class Command(CommandTimingMixin, BaseCommand):
     """
     Base command (you may see this if a child command had no help text defined)
 
@@ -30,160 +70,12 @@ class Command(BaseCommand):
     pass
 
 
-# -------------------------------------------------------------
-#
-# The default commands inherit from
-#
-#   evennia.commands.default.muxcommand.MuxCommand.
-#
-# If you want to make sweeping changes to default commands you can
-# uncomment this copy of the MuxCommand parent and add
-#
-#   COMMAND_DEFAULT_CLASS = "commands.command.MuxCommand"
-#
-# to your settings file. Be warned that the default commands expect
-# the functionality implemented in the parse() method, so be
-# careful with what you change.
-#
-# -------------------------------------------------------------
-
-# from evennia.utils import utils
-#
-#
-# class MuxCommand(Command):
-#     """
-#     This sets up the basis for a MUX command. The idea
-#     is that most other Mux-related commands should just
-#     inherit from this and don't have to implement much
-#     parsing of their own unless they do something particularly
-#     advanced.
-#
-#     Note that the class's __doc__ string (this text) is
-#     used by Evennia to create the automatic help entry for
-#     the command, so make sure to document consistently here.
-#     """
-#     def has_perm(self, srcobj):
-#         """
-#         This is called by the cmdhandler to determine
-#         if srcobj is allowed to execute this command.
-#         We just show it here for completeness - we
-#         are satisfied using the default check in Command.
-#         """
-#         return super().has_perm(srcobj)
-#
-#     def at_pre_cmd(self):
-#         """
-#         This hook is called before self.parse() on all commands
-#         """
-#         pass
-#
-#     def at_post_cmd(self):
-#         """
-#         This hook is called after the command has finished executing
-#         (after self.func()).
-#         """
-#         pass
-#
-#     def parse(self):
-#         """
-#         This method is called by the cmdhandler once the command name
-#         has been identified. It creates a new set of member variables
-#         that can be later accessed from self.func() (see below)
-#
-#         The following variables are available for our use when entering this
-#         method (from the command definition, and assigned on the fly by the
-#         cmdhandler):
-#            self.key - the name of this command ('look')
-#            self.aliases - the aliases of this cmd ('l')
-#            self.permissions - permission string for this command
-#            self.help_category - overall category of command
-#
-#            self.caller - the object calling this command
-#            self.cmdstring - the actual command name used to call this
-#                             (this allows you to know which alias was used,
-#                              for example)
-#            self.args - the raw input; everything following self.cmdstring.
-#            self.cmdset - the cmdset from which this command was picked. Not
-#                          often used (useful for commands like 'help' or to
-#                          list all available commands etc)
-#            self.obj - the object on which this command was defined. It is often
-#                          the same as self.caller.
-#
-#         A MUX command has the following possible syntax:
-#
-#           name[ with several words][/switch[/switch..]] arg1[,arg2,...] [[=|,] arg[,..]]
-#
-#         The 'name[ with several words]' part is already dealt with by the
-#         cmdhandler at this point, and stored in self.cmdname (we don't use
-#         it here). The rest of the command is stored in self.args, which can
-#         start with the switch indicator /.
-#
-#         This parser breaks self.args into its constituents and stores them in the
-#         following variables:
-#           self.switches = [list of /switches (without the /)]
-#           self.raw = This is the raw argument input, including switches
-#           self.args = This is re-defined to be everything *except* the switches
-#           self.lhs = Everything to the left of = (lhs:'left-hand side'). If
-#                      no = is found, this is identical to self.args.
-#           self.rhs: Everything to the right of = (rhs:'right-hand side').
-#                     If no '=' is found, this is None.
-#           self.lhslist - [self.lhs split into a list by comma]
-#           self.rhslist - [list of self.rhs split into a list by comma]
-#           self.arglist = [list of space-separated args (stripped, including '=' if it exists)]
-#
-#           All args and list members are stripped of excess whitespace around the
-#           strings, but case is preserved.
-#         """
-#         raw = self.args
-#         args = raw.strip()
-#
-#         # split out switches
-#         switches = []
-#         if args and len(args) > 1 and args[0] == "/":
-#             # we have a switch, or a set of switches. These end with a space.
-#             switches = args[1:].split(None, 1)
-#             if len(switches) > 1:
-#                 switches, args = switches
-#                 switches = switches.split('/')
-#             else:
-#                 args = ""
-#                 switches = switches[0].split('/')
-#         arglist = [arg.strip() for arg in args.split()]
-#
-#         # check for arg1, arg2, ... = argA, argB, ... constructs
-#         lhs, rhs = args, None
-#         lhslist, rhslist = [arg.strip() for arg in args.split(',')], []
-#         if args and '=' in args:
-#             lhs, rhs = [arg.strip() for arg in args.split('=', 1)]
-#             lhslist = [arg.strip() for arg in lhs.split(',')]
-#             rhslist = [arg.strip() for arg in rhs.split(',')]
-#
-#         # save to object properties:
-#         self.raw = raw
-#         self.switches = switches
-#         self.args = args.strip()
-#         self.arglist = arglist
-#         self.lhs = lhs
-#         self.lhslist = lhslist
-#         self.rhs = rhs
-#         self.rhslist = rhslist
-#
-#         # if the class has the account_caller property set on itself, we make
-#         # sure that self.caller is always the account if possible. We also create
-#         # a special property "character" for the puppeted object, if any. This
-#         # is convenient for commands defined on the Account only.
-#         if hasattr(self, "account_caller") and self.account_caller:
-#             if utils.inherits_from(self.caller, "evennia.objects.objects.DefaultObject"):
-#                 # caller is an Object/Character
-#                 self.character = self.caller
-#                 self.caller = self.caller.account
-#             elif utils.inherits_from(self.caller, "evennia.accounts.accounts.DefaultAccount"):
-#                 # caller was already an Account
-#                 self.character = self.caller.get_puppet(self.session)
-#             else:
-#                 self.character = None
-
-
-
+class MuxCommand(CommandTimingMixin, BaseMuxCommand):
+    """
+    Evennia's MuxCommand with timing. The default commands inherit from this too, through
 
+        COMMAND_DEFAULT_CLASS = "commands.command.MuxCommand"
 
+    in settings.
+    """
+    pass
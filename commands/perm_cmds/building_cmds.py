@@ -1,11 +1,13 @@
 from evennia.commands.cmdset import CmdSet
 from evennia.commands.default.building import CmdDig, CmdTunnel
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.utils.containers import GLOBAL_SCRIPTS
 
 from combat.combat_constants import DIRECTION_NAMES_OPPOSITES
+from commands.command import MuxCommand
 from typeclasses.base.objects import Object
 from world.locations.areas import Area
+from world.locations.rooms import hierarchy_changed
+from world.locations.zones import rezone_rooms
 
 
 # Extended to add new room to current area unless using "delocalize" switch
@@ -191,6 +193,9 @@ class MyCmdDig(CmdDig):
             if area:
                 new_room.db.area = area
                 area.db.rooms.append(new_room)
+                hierarchy_changed()
+                for problem in rezone_rooms([new_room], None, new_room.zone()):
+                    self.caller.msg(problem)
                 self.caller.msg(f"Area {area.name} assigned.")
             env = old_room.db.environment
             if env:
@@ -336,7 +341,7 @@ class MyCmdTunnel(CmdTunnel):
             new_room = (current_room.search(exitname,
                                             candidates=[obj for obj in current_room.contents if obj.destination])
                         .destination)
-            new_room.db.coordinates = (x, y, z)
+            new_room.set_coordinates(x, y, z)
 
 
 class CmdDestroyArea(MuxCommand):
@@ -1,5 +1,6 @@
 from evennia.commands.cmdset import CmdSet
-from evennia.commands.default.muxcommand import MuxCommand
+
+from commands.command import MuxCommand
 
 
 class CmdEndCombat(MuxCommand):
@@ -4,14 +4,13 @@ from evennia.utils.evmenu import EvMenu
 from evennia.commands.cmdset import CmdSet
 from evennia.commands.default.help import CmdSetHelp, HelpCategory, DEFAULT_HELP_CATEGORY, _loadhelp, _savehelp, \
     _quithelp
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.locks.lockhandler import LockException
 from evennia.utils import inherits_from, create
 from evennia.utils.create import create_object
 from evennia.utils.eveditor import EvEditor
 
 from combat.abilities import all_abilities
-from combat.abilities.all_abilities import ALL_ABILITIES
+from commands.command import MuxCommand
 from server import appearance
 from stats.combat_entity import CombatEntity
 from stats.rpg_classes import Templar, Warden, Gladiator, Assassin, Ranger, Monk, Sorcerer, Cleric, Druid, Witch
@@ -26,9 +25,9 @@ class MyCmdSetHelp(CmdSetHelp):
         # The override
         ability = False
         ability_input = self.lhs
-        if ability_input in ALL_ABILITIES:
+        if ability_input in all_abilities.all_abilities():
             ability = True
-            obj = create_object(typeclass=ALL_ABILITIES[ability_input], key=ability_input)
+            obj = create_object(typeclass=all_abilities.all_abilities()[ability_input], key=ability_input)
             self.rhs = obj.get_help()
             obj.delete()
 
@@ -334,10 +333,13 @@ class CmdAutoLines(MuxCommand):
             lines = [line.strip() for line in lines]
 
             char.db.auto_lines[qid][stage].append(lines)
+            char.responses_changed()
+            char.location.npcs_changed()
             return
 
         elif "clear" in self.switches:
             char.db.auto_lines[qid][stage] = []
+            char.responses_changed()
         else:
             self.caller.msg(usage_msg)
 
@@ -559,6 +561,8 @@ def _create(caller, raw_string, **kwargs):
     entity.db.hostile_to_players = kwargs.get("hostile")
     entity.db.rpg_class = kwargs.get("rpg_class")
     entity.db.unique_name = kwargs.get("unique_name")
+    entity.appearance_changed()
+    caller.location.npcs_changed()
 
     return "end_node"
 
@@ -711,6 +715,7 @@ class CmdTeach(MuxCommand):
 
         instance = create_object(typeclass=ability, key = ability.key, location = char)
         char.db.abilities.append(instance)
+        all_abilities.abilities_changed(char)
         self.caller.location.msg_contents(f"{self.caller.get_display_name()} taught the {instance.get_display_name()} "
                                           f"ability to {char.get_display_name()}.")
 
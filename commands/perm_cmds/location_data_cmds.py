@@ -1,18 +1,24 @@
 import decimal
+import os
 from decimal import Decimal
 
 import evennia
+from django.conf import settings
 from evennia.utils.containers import GLOBAL_SCRIPTS
 from evennia.commands.cmdset import CmdSet
-from evennia.commands.default.muxcommand import MuxCommand
 
+from commands.command import MuxCommand
 from server import appearance
 from server.appearance import ENVIRONMENTS_BY_TYPE
 from typeclasses.scripts.weather import WEATHERS
+from world.ingame_map_display import invalidate_maps
+from world.locations import world_file
 from world.locations.areas import Area
+from world.locations.exit_graph import EXIT_GRAPH
 from world.locations.localities import Locality
 from world.locations.regions import Region
-from world.locations.zones import Zone
+from world.locations.rooms import hierarchy_changed
+from world.locations.zones import Zone, rezone_rooms
 
 
 class CmdLocations(MuxCommand):
@@ -22,23 +28,30 @@ class CmdLocations(MuxCommand):
         Usage:
           locations/create(/delocalize) <location type> = <location name>
           locations/set <location name>
+          locations/coords <x>, <y>, <z>
+          locations/reindex
 
         Switches:
             create - create a new location with the given name
             delocalize - do not assign in location hierarchy automatically
             set - assign the given location to the current room at the appropriate
                 place in the hierarchy
+            coords - set the current room's coordinates within its zone
+            reindex - rebuild the current zone's index of rooms by coordinates,
+                i.e. after coordinates were changed with @set, and the
+                world's exit graph, i.e. after exits were aliased or relinked
 
         Examples:
            locations/create area = Kojo Monastery
            locations/set The Kojo Archipelago
+           locations/coords 0, 0, 0
 
         This command handles the entire hierarchy of locations (room, area, locality,
         zone, region), undertaking creation, assignment, and arrangement of location
         trees.
         """
     key = "@locations"
-    switch_options = ("create", "delocalize", "set")
+    switch_options = ("create", "delocalize", "set", "coords", "reindex")
     locks = "cmd:perm(locations) or perm(Builder)"
     help_category = "building"
 
@@ -94,22 +107,29 @@ class CmdLocations(MuxCommand):
                         if adjacent_locality:
                             new_location.db.locality = adjacent_locality
                             adjacent_locality.db.areas.append(new_location)
+                            hierarchy_changed()
                             self.caller.msg(f"Locality {adjacent_locality.name} assigned to {name}.")
                         # Start the area with the room we are in
+                        old_zone = current_room.zone()
                         current_room.db.area = new_location
                         current_room.db.area.db.rooms.append(current_room)
+                        hierarchy_changed()
+                        for problem in rezone_rooms([current_room], old_zone, current_room.zone()):
+                            self.caller.msg(problem)
                         self.caller.msg(f"Current room assigned to {name} area.")
                     case "Locality":
                         zone = current_room.zone()
                         if zone:
                             new_location.db.zone = zone
                             zone.db.localities.append(new_location)
+                            hierarchy_changed()
                             self.caller.msg(f"Zone {zone.name} assigned to {name}.")
                     case "Zone":
                         region = current_room.region()
                         if region:
                             new_location.db.region = region
                             region.db.zones.append(new_location)
+                            hierarchy_changed()
                             self.caller.msg(f"Region {region.name} assigned to {name}.")
                     case "Region":
                         pass
@@ -138,8 +158,12 @@ class CmdLocations(MuxCommand):
                             pass
 
                     # Add this room to the given area
+                    old_zone = current_room.zone()
                     current_room.db.area = script
                     script.db.rooms.append(current_room)
+                    hierarchy_changed()
+                    for problem in rezone_rooms([current_room], old_zone, current_room.zone()):
+                        self.caller.msg(problem)
                     self.caller.msg("Current room's area set to " + script.name)
 
                 case "Locality":
@@ -158,8 +182,12 @@ class CmdLocations(MuxCommand):
                             pass
 
                     # Add current area to the given locality
+                    old_zone = current_room.zone()
                     area.db.locality = script
                     script.db.areas.append(area)
+                    hierarchy_changed()
+                    for problem in rezone_rooms(area.db.rooms, old_zone, script.db.zone):
+                        self.caller.msg(problem)
                     self.caller.msg(f"Locality for {area.name} set to " + script.name)
 
                 case "Zone":
@@ -180,6 +208,10 @@ class CmdLocations(MuxCommand):
                     # Add current locality to the given zone
                     locality.db.zone = script
                     script.db.localities.append(locality)
+                    hierarchy_changed()
+                    rooms = [room for area in locality.db.areas for room in area.db.rooms]
+                    for problem in rezone_rooms(rooms, zone, script):
+                        self.caller.msg(problem)
                     self.caller.msg(f"Zone for {locality.name} set to " + script.name)
 
                 case "Region":
@@ -199,8 +231,37 @@ class CmdLocations(MuxCommand):
                     # Add current zone to the given region
                     zone.db.region = script
                     script.db.zones.append(zone)
+                    hierarchy_changed()
                     self.caller.msg(f"Region of {zone.name} set to " + script.name)
 
+        elif "coords" in self.switches:
+            current_room = self.caller.location
+            try:
+                x, y, z = [int(coordinate) for coordinate in self.lhslist]
+            except ValueError:
+                self.caller.msg("Usage: locations/coords <x>, <y>, <z>")
+                return
+            zone = current_room.zone()
+            if zone:
+                existing_room = zone.get_room(x, y, z)
+                if existing_room and existing_room != current_room:
+                    self.caller.msg(f"{existing_room.get_display_name()} is already at ({x}, {y}, {z}) in {zone.name}!")
+                    return
+            current_room.set_coordinates(x, y, z)
+            self.caller.msg(f"Current room's coordinates set to ({x}, {y}, {z}).")
+
+        elif "reindex" in self.switches:
+            zone = self.caller.location.zone()
+            if not zone:
+                self.caller.msg("The current room isn't in a zone!")
+                return
+            index = zone.rebuild_room_index()
+            self.caller.msg(f"Indexed {len(index)} rooms by coordinates in {zone.name}.")
+            EXIT_GRAPH.build()
+            invalidate_maps()
+            self.caller.msg(f"Rebuilt the exit graph of {EXIT_GRAPH.num_exits()} exits in "
+                            f"{EXIT_GRAPH.build_time * 1000:.1f}ms.")
+
 
 class CmdEnv(MuxCommand):
     """
@@ -233,6 +294,7 @@ class CmdEnv(MuxCommand):
             environment = self.lhs
             room = self.caller.location
             room.db.environment = environment
+            invalidate_maps(room)
             self.caller.msg(f"Set {room.name} to environment: {environment}")
 
 
@@ -316,8 +378,60 @@ class CmdWeather(MuxCommand):
             self.caller.msg("Warning - Current weather weights do not total to 100%")
 
 
+class CmdWorldFile(MuxCommand):
+    """
+        save or load regions as a world file
+
+        Usage:
+          worldfile/save <file> [= <region>]
+          worldfile/load <file>
+
+        Examples:
+           worldfile/save worlds/test_world.jsonl
+           worldfile/save worlds/larkspur.jsonl = Larkspur
+           worldfile/load worlds/test_world.jsonl
+
+        Saves every region (or only the one given) with its zones,
+        localities, areas, rooms, fixtures, spawns and exits to a file,
+        or creates everything in a saved file. Paths are relative to the
+        game directory. See world/locations/world_file.py for the format.
+        """
+    key = "worldfile"
+    switch_options = ("save", "load")
+    locks = "cmd:perm(worldfile) or perm(Developer)"
+    help_category = "building"
+
+    def func(self):
+        if not self.lhs or not self.switches:
+            self.caller.msg(f"Usage: {appearance.cmd}worldfile/save <file> [= <region>]|n or "
+                            f"{appearance.cmd}worldfile/load <file>")
+            return
+        path = os.path.join(settings.GAME_DIR, self.lhs)
+
+        if "save" in self.switches:
+            regions = None
+            if self.rhs:
+                region = GLOBAL_SCRIPTS.get(self.rhs)
+                if not region or not isinstance(region, Region):
+                    self.caller.msg(f"No region called {self.rhs}.")
+                    return
+                regions = [region]
+            counts = world_file.save_world(path, regions)
+            verb = "Saved"
+        else:
+            try:
+                counts = world_file.load_world(path)
+            except (OSError, ValueError) as e:
+                self.caller.msg(f"Couldn't load {self.lhs}: {e}")
+                return
+            verb = "Loaded"
+        self.caller.msg(f"{verb} {", ".join(f"{count} {record_type}s" for record_type, count in counts.items())} "
+                        f"({self.lhs}).")
+
+
 class LocationCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdLocations)
         self.add(CmdEnv)
         self.add(CmdWeather)
+        self.add(CmdWorldFile)
@@ -1,6 +1,6 @@
 from evennia.commands.cmdset import CmdSet
-from evennia.commands.default.muxcommand import MuxCommand
 
+from commands.command import MuxCommand
 from server import appearance
 
 
@@ -40,6 +40,7 @@ class CmdAppear(MuxCommand):
             return
 
         character.db.appear_string = str(string_input)
+        character.appearance_changed()
 
 
 class ObjectDataCmdSet(CmdSet):
@@ -0,0 +1,58 @@
+from evennia.commands.cmdset import CmdSet
+from evennia.utils.evtable import EvTable
+
+from commands.command import MuxCommand
+from server import appearance
+from server.timings import COMBAT_TIMINGS, COMMAND_TIMINGS
+
+
+class CmdPerf(MuxCommand):
+    """
+        view server timing stats
+
+        Usage:
+          @perf[/switches]
+
+        Switches:
+          combat - show timings for each stage of combat instead of commands
+          tail - sort by 99th percentile instead of total time spent
+          reset - clear the collected timings (of commands, or of combat
+                  with /combat)
+
+        Shows how often each command (or stage of combat) has run since the
+        last reload or reset, the total time spent in it, and its 50th/95th/
+        99th percentile and maximum times over its most recent runs, in
+        milliseconds. A command's "(parse)" entry is the part of its time
+        spent parsing arguments. Commands slower than SLOW_COMMAND_THRESHOLD
+        in settings are also logged.
+        """
+    key = "@perf"
+    switch_options = ("combat", "tail", "reset")
+    locks = "cmd:perm(perf) or perm(Builder)"
+    help_category = "data"
+
+    def func(self):
+        timings = COMBAT_TIMINGS if "combat" in self.switches else COMMAND_TIMINGS
+
+        if "reset" in self.switches:
+            timings.reset()
+            self.caller.msg(f"Cleared {timings.name} timings.")
+            return
+
+        rows = timings.rows(sort_by="p99" if "tail" in self.switches else "total")
+        if not rows:
+            self.caller.msg(f"No {timings.name} timings recorded yet.")
+            return
+
+        table = EvTable("|wCommand" if timings is COMMAND_TIMINGS else "|wStage", "|wCount", "|wTotal", "|wp50",
+                        "|wp95", "|wp99", "|wMax", pretty_corners=True)
+        for stage, count, total, p50, p95, p99, max_ms in rows:
+            table.add_row(f"{appearance.highlight}{stage}|n", count, f"{total:.1f}", f"{p50:.2f}", f"{p95:.2f}",
+                          f"{p99:.2f}", f"{max_ms:.2f}")
+        self.caller.msg(f"|w{timings.name.capitalize()} timings (ms):")
+        self.caller.msg(table)
+
+
+class PerfCmdSet(CmdSet):
+    def at_cmdset_creation(self):
+        self.add(CmdPerf)
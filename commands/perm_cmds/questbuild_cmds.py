@@ -1,12 +1,16 @@
-import evennia
+import os
+
+from django.conf import settings
 from evennia.commands.cmdset import CmdSet
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.utils import inherits_from
 from evennia.utils.evtable import EvTable
 
+from commands.command import MuxCommand
 from server import appearance
-from world.quests.quest import all_quests, quest_desc, get_quest, get_stage
-from world.quests.quest_hooks import print_all_hooks, get_hook_type, location_string, print_quest_hook
+from world.quests import quest_file
+from world.quests.quest import all_quests, quest_desc, get_stage, stored_quests, quests_changed
+from world.quests.quest_hooks import print_all_hooks, get_hook_type, location_string, print_quest_hook, \
+    hooks_changed
 
 
 class CmdQuestEdit(MuxCommand):
@@ -115,80 +119,82 @@ class CmdQuestEdit(MuxCommand):
 
             # If making an edit / setting a value
             else:
-                # Default to empty quest info dict if this is the first data on this QID
+                self.edit_quest(qid, stage)
+                quests_changed()
+
+    def edit_quest(self, qid, stage):
+        """Applies the edit given by the switch and the value right of the = to the stored quest data."""
+        quests = stored_quests()
+        # Default to empty quest info dict if this is the first data on this QID
+        try:
+            quests[qid]
+        except KeyError:
+            quests[qid] = {"desc": "", "recommended_level": None, "stages": {}}
+
+        if "desc" in self.switches:
+            if stage is None:  # Set description for entire quest
+                quests[qid]["desc"] = self.rhs
+                self.caller.msg(f"Quest #{qid} short description set to '{self.rhs}'")
+            else:  # Set description for quest stage
+                # Ensure quest data has the "stages" dict
                 try:
-                    evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]
+                    quests[qid]["stages"]
                 except KeyError:
-                    evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid] = \
-                        {"desc": "", "recommended_level": None, "stages": {}}
-
-                if "desc" in self.switches:
-                    if stage is None:  # Set description for entire quest
-                        evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["desc"] = self.rhs
-                        self.caller.msg(f"Quest #{qid} short description set to '{self.rhs}'")
-                    else:  # Set description for quest stage
-                        # Ensure quest data has the "stages" dict
-                        try:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"]
-                        except KeyError:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"] = {}
-                        # Ensure the stages data includes this stage
-                        try:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage]["desc"] = self.rhs
-                            self.caller.msg(f"Stage {qid}.{stage} short description set to '{self.rhs}'")
-                        except KeyError:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage] = {
-                                "desc": self.rhs,
-                                "objective_type": ""}
-                            self.caller.msg(f"Stage {qid}.{stage} short description set to '{self.rhs}'")
-                        return
+                    quests[qid]["stages"] = {}
+                # Ensure the stages data includes this stage
+                try:
+                    quests[qid]["stages"][stage]["desc"] = self.rhs
+                    self.caller.msg(f"Stage {qid}.{stage} short description set to '{self.rhs}'")
+                except KeyError:
+                    quests[qid]["stages"][stage] = {
+                        "desc": self.rhs,
+                        "objective_type": ""}
+                    self.caller.msg(f"Stage {qid}.{stage} short description set to '{self.rhs}'")
+                return
 
-                elif "long" in self.switches:
-                    if stage is None:  # Set long_desc for entire quest
-                        evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["long_desc"] = self.rhs
-                        self.caller.msg(f"Quest #{qid} long description set to '{self.rhs}'")
-                    else:  # Set long_desc for quest stage
-                        # Ensure quest data has the "stages" dict
-                        try:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"]
-                        except KeyError:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"] = {}
-                        # Ensure the stages data includes this stage
-                        try:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage]["long_desc"] = (
-                                self.rhs)
-                            self.caller.msg(f"Stage {qid}.{stage} long description set to '{self.rhs}'")
-                        except KeyError:
-                            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage] = {
-                                "desc": "",
-                                "objective_type": "",
-                                "long_desc": self.rhs}
-                            self.caller.msg(f"Stage {qid}.{stage} long description set to '{self.rhs}'")
-                        return
+        elif "long" in self.switches:
+            if stage is None:  # Set long_desc for entire quest
+                quests[qid]["long_desc"] = self.rhs
+                self.caller.msg(f"Quest #{qid} long description set to '{self.rhs}'")
+            else:  # Set long_desc for quest stage
+                # Ensure quest data has the "stages" dict
+                try:
+                    quests[qid]["stages"]
+                except KeyError:
+                    quests[qid]["stages"] = {}
+                # Ensure the stages data includes this stage
+                try:
+                    quests[qid]["stages"][stage]["long_desc"] = self.rhs
+                    self.caller.msg(f"Stage {qid}.{stage} long description set to '{self.rhs}'")
+                except KeyError:
+                    quests[qid]["stages"][stage] = {
+                        "desc": "",
+                        "objective_type": "",
+                        "long_desc": self.rhs}
+                    self.caller.msg(f"Stage {qid}.{stage} long description set to '{self.rhs}'")
+                return
 
-                elif "level" in self.switches:
-                    # Parse level value
-                    try:
-                        level = int(self.rhs)
-                    except ValueError:
-                        self.caller.msg("Couldn't get an integer level from " + self.rhs)
+        elif "level" in self.switches:
+            # Parse level value
+            try:
+                level = int(self.rhs)
+            except ValueError:
+                self.caller.msg("Couldn't get an integer level from " + self.rhs)
 
-                    # Default to empty quest info dict if this is the first data on this QID
-                    try:
-                        evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]
-                    except KeyError:
-                        evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid] = \
-                            {"desc": "", "recommended_level": None, "stages": {}}
+            # Default to empty quest info dict if this is the first data on this QID
+            try:
+                quests[qid]
+            except KeyError:
+                quests[qid] = {"desc": "", "recommended_level": None, "stages": {}}
 
-                    # Set recommended level in quest data
-                    evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["recommended_level"] = level
-                    self.caller.msg(f"Quest #{qid} recommended level set to {level}.")
-                    return
+            # Set recommended level in quest data
+            quests[qid]["recommended_level"] = level
+            self.caller.msg(f"Quest #{qid} recommended level set to {level}.")
+            return
 
-                elif "quiet" in self.switches:
-                    evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage]["quiet"] = \
-                        not evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage].get("quiet", False)
-                    self.caller.msg(f"Set quiet to {evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests[qid]["stages"][stage]["quiet"]}")
+        elif "quiet" in self.switches:
+            quests[qid]["stages"][stage]["quiet"] = not quests[qid]["stages"][stage].get("quiet", False)
+            self.caller.msg(f"Set quiet to {quests[qid]["stages"][stage]["quiet"]}")
 
 
 class CmdQuestHook(MuxCommand):
@@ -278,6 +284,7 @@ class CmdQuestHook(MuxCommand):
                 obj.db.quest_hooks[objective_type][qid] = {}
                 obj.db.quest_hooks[objective_type][qid][stage] = {}
                 self.caller.msg(f"Added {objective_type} hook data to {obj.key} for stage {qid}.{stage}")
+            hooks_changed(obj)
 
             # Auto-set next_stage
             if objective_type != "at_told":
@@ -287,7 +294,7 @@ class CmdQuestHook(MuxCommand):
                                 f"{appearance.cmd}qh/edit {obj.key} = {qid}.{stage}|n to change")
 
             # Add hook info to quest data
-            quests = all_quests()
+            quests = stored_quests()
             try:
                 quests[qid]
             except KeyError:
@@ -301,10 +308,10 @@ class CmdQuestHook(MuxCommand):
                 self.caller.msg("Attributes auto-set in global quest data.")
             except KeyError:
                 quests[qid]["stages"][stage] = {"objective_type": objective_type, "object": obj}
-                quests[qid]["stages"][stage]["location"] = location_string(qid, stage)
+                quests[qid]["stages"][stage]["location"] = location_string(qid, stage,
+                                                                           objective_type=objective_type, obj=obj)
                 self.caller.msg("Attributes auto-set in global quest data.")
-
-            evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests = quests
+            quests_changed()
 
         def valiate_next_stage(stage_input):
             if stage_input != "None":
@@ -354,8 +361,9 @@ class CmdQuestHook(MuxCommand):
             objective_type = get_hook_type(obj, qid, stage)
             del obj.db.quest_hooks[objective_type][qid][stage]
             del obj.db.quest_hooks[objective_type][qid]
-            quests = evennia.GLOBAL_SCRIPTS.get("All Quests").db.quests
-            del quests[qid]["stages"][stage]
+            hooks_changed(obj)
+            del stored_quests()[qid]["stages"][stage]
+            quests_changed()
             self.caller.msg(f"Stage {qid}.{stage} {objective_type} hook on {obj.key} removed.")
 
         elif "edit" in self.switches:
@@ -478,6 +486,7 @@ class CmdQuestHook(MuxCommand):
                         obj.db.quest_hooks[hook_type][qid][stage]["options"].append(opt_dict)
                     except IndexError:
                         obj.db.quest_hooks[hook_type][qid][stage]["options"].insert(opt_num, opt_dict)
+                    hooks_changed(obj)
 
                 case _:
                     self.caller.msg("No valid option found for " + inpt)
@@ -535,10 +544,9 @@ class CmdKillCounter(MuxCommand):
             return
 
         # Get quest and stage data
-        quest_dict = get_quest(qid)
-        if quest_dict is None:
-            quest_dict = {"desc": "", "stages": {}}
-            all_quests()[qid] = quest_dict
+        quests = stored_quests()
+        if qid not in quests:
+            quests[qid] = {"desc": "", "stages": {}}
         stage_dict = get_stage(qid, stage)
         if stage_dict is None:
             stage_dict = {"desc": ""}
@@ -547,17 +555,78 @@ class CmdKillCounter(MuxCommand):
         stage_dict["objective_type"] = "kill_counter"
         stage_dict["target_type"] = path_to_type
         stage_dict["kill_num"] = num_to_kill
-        stage_dict["next_stage"] = next_stage
+        stage_dict["next_stage"] = f"{qid}.{next_stage}"
 
         # Reflect changed data in all_quests container
-        all_quests()[qid]["stages"][stage] = stage_dict
+        quests[qid]["stages"][stage] = stage_dict
+        quests_changed()
 
         self.caller.msg(f"{qid}.{stage} stored in global quest data as kill counter:")
         self.caller.msg(stage_dict)
 
 
+class CmdQuestFile(MuxCommand):
+    """
+        export, import or check quests as a quest file
+
+        Usage:
+          questfile/export <file>
+          questfile/import <file>
+          questfile/check [<file>]
+
+        Examples:
+           questfile/export quests/all_quests.jsonl
+           questfile/import quests/hunter_quests.jsonl
+           questfile/check
+
+        Writes all quest data and the quest hooks on every object a stage
+        is tied to to a file, or adds the quests and hooks in a file to the
+        game. Check looks through a file (or the game's quests) for hooks
+        on missing objects, next stages that don't exist and stages nothing
+        leads to, without changing anything; importing shows the same
+        problems. Paths are relative to the game directory. See
+        world/quests/quest_file.py for the format.
+        """
+    key = "questfile"
+    switch_options = ("export", "import", "check")
+    locks = "cmd:perm(questfile) or perm(Developer)"
+    help_category = "data"
+
+    def func(self):
+        if not self.switches or (not self.lhs and "check" not in self.switches):
+            self.caller.msg(f"Usage: {appearance.cmd}questfile/export <file>|n, "
+                            f"{appearance.cmd}questfile/import <file>|n or {appearance.cmd}questfile/check [<file>]")
+            return
+        path = os.path.join(settings.GAME_DIR, self.lhs)
+
+        problems = []
+        try:
+            if "export" in self.switches:
+                counts = quest_file.export_quests(path)
+                self.caller.msg(f"Exported {self.counts_string(counts)} ({self.lhs}).")
+            elif "import" in self.switches:
+                counts, problems = quest_file.import_quests(path)
+                self.caller.msg(f"Imported {self.counts_string(counts)} ({self.lhs}).")
+            else:
+                records = quest_file.read_records(path) if self.lhs else quest_file.quest_records()
+                problems = quest_file.validate_records(records)
+                if not problems:
+                    self.caller.msg(f"No problems found in {self.lhs or "quest data"}.")
+        except (OSError, ValueError) as e:
+            self.caller.msg(f"Couldn't {self.switches[0]} {self.lhs}: {e}")
+            return
+
+        for problem in problems:
+            self.caller.msg(f"{appearance.warning}{problem}")
+
+    @staticmethod
+    def counts_string(counts):
+        return ", ".join(f"{count} {record_type}s" for record_type, count in counts.items())
+
+
 class QuestBuildCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdQuestEdit)
         self.add(CmdQuestHook)
         self.add(CmdKillCounter)
+        self.add(CmdQuestFile)
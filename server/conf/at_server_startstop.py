@@ -18,7 +18,9 @@ at_server_cold_stop()
 """
 import evennia
 
+from typeclasses.scripts.item_scripts import restore_hidden
 from typeclasses.scripts.scripts import Script
+from world.locations.exit_graph import EXIT_GRAPH
 
 
 def at_server_init():
@@ -33,7 +35,8 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    EXIT_GRAPH.build()
+    restore_hidden()
 
 
 def at_server_stop():
@@ -47,6 +47,10 @@ BASE_EXIT_TYPECLASS = "world.locations.exits.Exit"
 BASE_SCRIPT_TYPECLASS = "typeclasses.scripts.scripts.Script"
 BASE_CHANNEL_TYPECLASS = "typeclasses.ooc.channels.Channel"
 
+COMMAND_DEFAULT_CLASS = "commands.command.MuxCommand"
+# Commands taking longer than this many seconds are logged as slow (see commands.command)
+SLOW_COMMAND_THRESHOLD = 0.1
+
 CMDSET_CHARACTER = "commands.character_cmdsets.PlayerCmdSet"
 CMDSET_FALLBACKS = {
     CMDSET_CHARACTER: "evennia.commands.default.cmdset_character.CharacterCmdSet",
@@ -0,0 +1,73 @@
+"""
+A server-wide scheduler for things that should happen once at a given time, like respawning items, so that however
+many are waiting there is only ever one pending timer - for whichever is due first.
+
+Nothing here is saved. Whatever schedules something should also store when it's due, and schedule it again from
+at_server_start after a reload (see ReplenishItem).
+"""
+import heapq
+from time import time
+
+from evennia.utils import delay, logger
+
+
+class Scheduler:
+    """A heap of [due time, order, callback, args] entries, run by a single delay for the earliest."""
+
+    def __init__(self):
+        self.queue = []
+        self.order = 0  # Breaks ties between entries due at the same time, keeping them in the order scheduled
+        self.task = None
+        self.task_due = None
+
+    def __len__(self):
+        return len(self.queue)
+
+    def schedule_at(self, due, callback, *args):
+        """
+        Call callback(*args) at the given time.
+
+        :param due: Time to call it, in seconds since the epoch as from time.time().
+        :return: The entry, which can be passed to cancel().
+        """
+        entry = [due, self.order, callback, args]
+        self.order += 1
+        heapq.heappush(self.queue, entry)
+        self.wake()
+        return entry
+
+    def schedule(self, seconds, callback, *args):
+        """Call callback(*args) after the given number of seconds."""
+        return self.schedule_at(time() + seconds, callback, *args)
+
+    @staticmethod
+    def cancel(entry):
+        # Cancelled entries are left in the heap and skipped when they come due
+        entry[2] = None
+
+    def wake(self):
+        """Make sure the pending delay fires when the earliest entry is due."""
+        if not self.queue:
+            return
+        due = self.queue[0][0]
+        if self.task and self.task.active():
+            if self.task_due <= due:
+                return
+            self.task.cancel()
+        self.task_due = due
+        self.task = delay(max(0, due - time()), self.run_due)
+
+    def run_due(self):
+        self.task = None
+        now = time()
+        while self.queue and self.queue[0][0] <= now:
+            due, order, callback, args = heapq.heappop(self.queue)
+            if callback:
+                try:
+                    callback(*args)
+                except Exception:
+                    logger.log_trace()
+        self.wake()
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,86 @@
+"""
+In-memory timing histograms for finding what's slow on a live server. Nothing here is saved; stats start fresh on
+every reload, and can be viewed or reset with the @perf command.
+"""
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+# How many of the most recent samples to keep per stage for percentiles
+SAMPLE_SIZE = 1000
+
+
+class StageTimings:
+    """Running count and total for one stage, plus a rolling window of recent durations for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def percentiles(self, *percents):
+        """Return the given percentiles (0-100) of the recent samples, in seconds."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in percents]
+        return [ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] for percent in percents]
+
+
+class Timings:
+    """A named group of stage timings, i.e. all the stages of resolving an attack."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        try:
+            self.stages[stage].add(seconds)
+        except KeyError:
+            self.stages[stage] = StageTimings()
+            self.stages[stage].add(seconds)
+
+    def timed(self, stage):
+        """Decorator recording how long each call of the decorated function takes under the given stage name."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(stage, perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def reset(self):
+        self.stages = {}
+
+    def rows(self, sort_by="total"):
+        """
+        Return a summary row per stage, sorted with the most expensive first.
+
+        :param sort_by: "total" for overall time spent, or "p99" for tail latency.
+        :return: List of (stage, count, total ms, p50 ms, p95 ms, p99 ms, max ms) tuples.
+        """
+        rows = []
+        for stage, timings in self.stages.items():
+            p50, p95, p99 = timings.percentiles(50, 95, 99)
+            rows.append((stage, timings.count, timings.total * 1000, p50 * 1000, p95 * 1000, p99 * 1000,
+                         timings.max * 1000))
+        key_index = 5 if sort_by == "p99" else 2
+        return sorted(rows, key=lambda row: row[key_index], reverse=True)
+
+
+COMBAT_TIMINGS = Timings("combat")
+COMMAND_TIMINGS = Timings("command")
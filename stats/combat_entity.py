@@ -8,14 +8,13 @@ from evennia.utils import inherits_from, logger
 from combat.combat_constants import DIRECTION_NAMES_OPPOSITES
 from combat.combat_handler import COMBAT
 from combat.effects import EffectScript, DurationEffect
-from server import appearance
 from stats.stats_calculations import level_to_max_hp, constitution_to_max_hp, level_to_max_stamina, \
     level_to_max_mana, strength_to_max_stamina, spirit_to_max_mana
 from stats.stats_constants import (MAX_HP_BASE, MAX_MANA_BASE, MAX_STAM_BASE)
-from typeclasses.inanimate.fixtures import Fireplace
 from typeclasses.inanimate.items.item_types.equipment.equipment import EquipmentEntity
 from typeclasses.living.corpses import make_corpse, set_to_respawn
-from world.quests.quest import quest_desc
+from world.locations.exit_graph import EXIT_GRAPH
+from world.quests.quest_hooks import hook_stages
 
 
 class CombatEntity(EquipmentEntity):
@@ -98,7 +97,7 @@ class CombatEntity(EquipmentEntity):
         """
         #Regenerate everything 3x faster in rooms with fireplaces
         if self.location and inherits_from(self.location, "world.locations.rooms.Room"):
-            if self.location.in_room(Fireplace):
+            if self.location.has_fireplace():
                 secs = 3 * secs
 
         self.db.hp_buildup += self.get_regen("hp") * secs
@@ -545,18 +544,17 @@ class CombatEntity(EquipmentEntity):
         """
         # A combination of this override and the direction commands is necessary to get the combat version of the
         # movement commands to execute whether there is a valid room exit found or not.
-        exts = [ext for ext in self.location.exits if ext.destination == destination]
-        if not exts:
+        direction, edge = EXIT_GRAPH.edge_to(self.location, destination)
+        if not edge:
             return True
-        ext = exts[0]
         if self.is_in_combat():
-            if ext.key in ("up", "down") or "up" in ext.aliases.all() or "down" in ext.aliases.all():
+            if direction in ("up", "down"):
                 self.msg("Can't change rooms during a fight!")
                 return False
             turn_handler = self.db.combat_turnhandler
-            if turn_handler.db.grid.step(obj=self, direction=ext.key[0]):
+            if turn_handler.db.grid.step(obj=self, direction=direction[0]):
                 self.location.msg_contents(f"{self.get_display_name(capital=True)} "
-                                           f"moves {DIRECTION_NAMES_OPPOSITES[ext.key[0]][0]}.")
+                                           f"moves {DIRECTION_NAMES_OPPOSITES[direction[0]][0]}.")
             turn_handler.turn_end_check(self)
             return False
         if self.db.hp <= 0:
@@ -619,33 +617,19 @@ class CombatEntity(EquipmentEntity):
 
         enemies = COMBAT.get_enemies(self)
         # Quest stages tied to killing this specific entity
-        hooks = self.db.quest_hooks["at_defeat"]
-        for qid in hooks:
-            for stage in hooks[qid]:
-                hook_data = hooks[qid][stage]
-                for enemy in enemies:
-                    if enemy.attributes.has("quest_stages") and enemy.quests.at_stage(qid, stage):
-                        enemy.msg(hook_data["msg"])
-                        enemy.quests.advance_quest(hook_data["next_stage"])
+        hooks = hook_stages(self, "at_defeat")
+        for enemy in enemies:
+            if not enemy.attributes.has("quest_stages"):
+                continue
+            for qid, stage in enemy.quests.stages_at(hooks):
+                hook_data = self.db.quest_hooks["at_defeat"][qid][stage]
+                enemy.msg(hook_data["msg"])
+                enemy.quests.advance_quest(hook_data["next_stage"])
 
         # Quest stages tied to killing a number of enemies of a type
         for enemy in enemies:
-            if not inherits_from(enemy, "typeclasses.living.players.PlayerCharacter"):
-                continue
-            kill_counters = enemy.db.kill_counters
-
-            for i, kill_counter in enumerate(kill_counters):
-                # Increment kill counter if defeated entity is of target type
-                enemy_type = kill_counter["target_type"]
-                if inherits_from(self, enemy_type):
-                    enemy.db.kill_counters[i]["killed"] += 1
-
-                # Check if kill counter has been filled, and advance to next stage if so
-                if kill_counter["killed"] >= kill_counter["needed"]:
-                    stage_desc = quest_desc(qid=kill_counter["QID"], stage=kill_counter["stage"])
-                    enemy.msg(f"{appearance.notify}You have completed: {stage_desc}!")
-                    stage_str = kill_counters[i]["next_stage"]
-                    enemy.quests.advance_quest(stage_str)
+            if inherits_from(enemy, "typeclasses.living.players.PlayerCharacter"):
+                enemy.quests.at_kill(self)
 
         return True
     # </editor-fold>
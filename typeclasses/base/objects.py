@@ -10,6 +10,8 @@ with a location in the game world (like Characters, Rooms, Exits).
 
 from evennia.objects.objects import DefaultObject
 
+from typeclasses.scripts.item_scripts import is_hidden
+
 
 class ObjectParent:
     """
@@ -230,6 +232,54 @@ class Object(ObjectParent, DefaultObject):
         self.db.plural_name = False
         self.db.long_desc = None
 
+    def at_object_post_creation(self):
+        # Objects created directly in a room don't trigger its at_object_receive, so let it know about them here
+        try:
+            self.location.index_content(self)
+            self.location.content_changed()
+        except AttributeError:
+            pass
+
+    def swap_typeclass(self, new_typeclass, **kwargs):
+        result = super().swap_typeclass(new_typeclass, **kwargs)
+        # Index it in the room again under its new classes
+        try:
+            self.location.unindex_content(self)
+            self.location.index_content(self)
+            self.location.content_changed()
+        except AttributeError:
+            pass
+        return result
+
+    def at_rename(self, oldname, newname):
+        super().at_rename(oldname, newname)
+        self.appearance_changed()
+
+    def appearance_changed(self):
+        """Call after changing anything this shows as in the room it's in, like its desc or appear_string."""
+        try:
+            self.location.content_changed()
+        except AttributeError:
+            pass
+
+    def filter_visible(self, obj_list, looker, **kwargs):
+        # Hidden objects are left out with a set lookup before any view locks are checked
+        return super().filter_visible([obj for obj in obj_list if not is_hidden(obj)], looker, **kwargs)
+
+    def at_pre_get(self, getter, **kwargs):
+        if is_hidden(self):
+            return False
+        return super().at_pre_get(getter, **kwargs)
+
+    def at_object_delete(self):
+        # Let the room this was in know it's gone
+        try:
+            self.location.unindex_content(self)
+            self.location.content_changed()
+        except AttributeError:
+            pass
+        return True
+
     def color(self):
         """Return the markup string for the color/appearance of objects of this type.
         Called by get_display_name and similar methods."""
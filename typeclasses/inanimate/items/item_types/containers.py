@@ -31,6 +31,7 @@ or implement the same locks/hooks in your own typeclasses.
     at_pre_put_in(putter, target, **kwargs)   - called with the pre-put hooks
 """
 from collections import defaultdict
+from decimal import Decimal as Dec
 
 from django.conf import settings
 from evennia import DefaultObject
@@ -72,6 +73,17 @@ class Container(Item):
     def color(self):
         return appearance.container
 
+    def at_object_receive(self, moved_obj, source_location, move_type="move", **kwargs):
+        super().at_object_receive(moved_obj, source_location, move_type, **kwargs)
+        # Whoever is carrying this now carries the new contents' weight too
+        if self.location and hasattr(self.location, "carry_changed"):
+            self.location.carry_changed(0, moved_obj.db.weight or Dec(0))
+
+    def at_object_leave(self, moved_obj, target_location, move_type="move", **kwargs):
+        super().at_object_leave(moved_obj, target_location, move_type, **kwargs)
+        if self.location and hasattr(self.location, "carry_changed"):
+            self.location.carry_changed(0, -(moved_obj.db.weight or Dec(0)))
+
     def at_pre_get_from(self, getter, target, **kwargs):
         """
         This will be called when something attempts to get another object FROM this object,
@@ -112,6 +124,10 @@ class Container(Item):
 
         return True
 
+    def prepare_contents(self, looker):
+        """Called before the looker searches this container's contents, i.e. to look at or get something from it."""
+        pass
+
     def get_display_things(self, looker, **kwargs):
         """
         Get the 'things' component of the object description. Called by `return_appearance`.
@@ -179,6 +195,8 @@ class CmdContainerLook(CmdLook):
                 container = caller.search(self.rhs)
                 if not container:
                     return
+                if hasattr(container, "prepare_contents"):
+                    container.prepare_contents(caller)
 
             viewing_all = False
             if self.lhs.startswith("in "):
@@ -235,6 +253,8 @@ class CmdContainerGet(CmdGet):
                 else:
                     self.msg("You can't get things from that.")
                 return
+            if hasattr(location, "prepare_contents"):
+                location.prepare_contents(caller)
 
         if self.lhs == "all":
             if not location.attributes.has("capacity"):
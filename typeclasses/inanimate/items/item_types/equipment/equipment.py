@@ -1,7 +1,6 @@
 from collections import defaultdict
 
 from evennia import DefaultCharacter
-from evennia.commands.default.muxcommand import MuxCommand
 from evennia.commands.cmdset import CmdSet
 from evennia.utils import (
     at_search_result, inherits_from,
@@ -10,6 +9,7 @@ from evennia.utils.evtable import EvTable
 
 from combat.effects import StatMod
 from combat.combat_constants import DamageTypes
+from commands.command import MuxCommand
 from commands.default_cmdsets import CharacterCmdSet
 from server import appearance
 from typeclasses.inanimate.items.items import Item
@@ -101,6 +101,8 @@ class Equipment(Item):
         # Fill slot and set to equipped
         wearer.db.equipment[self.db.equipment_slot] = self
         self.db.equipped = True
+        if self.location == wearer:
+            wearer.carry_changed(-1, -self.total_weight())  # Worn items don't count toward carry limits
 
         # Echo a message to the room
         if not quiet:
@@ -133,6 +135,8 @@ class Equipment(Item):
         # Remove and set to unequipped
         wearer.db.equipment[self.db.equipment_slot] = None
         self.db.equipped = False
+        if self.location == wearer:  # Not when unequipped after being dropped
+            wearer.carry_changed(1, self.total_weight())
 
         if self.db.equip_effects:
             for equip_effect in self.db.equip_effects:
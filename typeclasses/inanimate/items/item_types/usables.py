@@ -150,7 +150,7 @@ class Consumable(Usable):
                 else:  # If a string, use value of item_consumable to spawn an object in its place
                     residue = spawn({"prototype": self.db.item_consumable})[0]  # Spawn the residue
                     # Move the residue to the same place as the item
-                    residue.location = self.location
+                    residue.move_to(self.location, quiet=True, move_type="spawn")
                     user.msg("After using %s, you are left with %s." % (self, residue))
                     self.delete()  # Delete the spent item
 
@@ -4,6 +4,7 @@ from evennia.utils.evtable import EvTable
 
 from server import appearance
 from typeclasses.base.objects import Object
+from world.quests.quest_hooks import hook_stages
 
 
 class Item(Object):
@@ -20,6 +21,23 @@ class Item(Object):
     def color(self):
         return appearance.item
 
+    def total_weight(self):
+        """The item's weight plus the weight of anything in it."""
+        return (self.db.weight or Dec(0)) + sum((content.db.weight or Dec(0) for content in self.contents), Dec(0))
+
+    def at_object_delete(self):
+        # Deleting doesn't call at_object_leave, so whoever was carrying this stops counting it here. Only its own
+        # weight comes off - anything in it is moved out afterward, which takes that weight off the usual way.
+        weight = self.db.weight or Dec(0)
+        location = self.location
+        if location and hasattr(location, "carry_changed"):
+            if not self.db.equipped:
+                location.carry_changed(-1, -weight)
+        elif location and location.location and hasattr(location.location, "carry_changed"):
+            # In a container someone is carrying, which only adds to their weight
+            location.location.carry_changed(0, -weight)
+        return super().at_object_delete()
+
     def identify(self):
         """Return a table containing details on the item such as its stats and effects."""
         table = EvTable(self.get_display_name(), (self.color() + self.__class__.__name__), pretty_corners=True)
@@ -29,23 +47,21 @@ class Item(Object):
 
     def at_get(self, getter, **kwargs):
         super().at_get(getter, **kwargs)
-        hooks = self.db.quest_hooks["at_get"]
-        for qid in hooks:
-            for stage in hooks[qid]:
-                hook_data = hooks[qid][stage]
-                if getter.attributes.has("quest_stages") and getter.quests.at_stage(qid, stage):
-                    getter.msg(hook_data["msg"])
-                    getter.quests.advance_quest(hook_data["next_stage"])
+        if not getter.attributes.has("quest_stages"):
+            return
+        for qid, stage in getter.quests.stages_at(hook_stages(self, "at_get")):
+            hook_data = self.db.quest_hooks["at_get"][qid][stage]
+            getter.msg(hook_data["msg"])
+            getter.quests.advance_quest(hook_data["next_stage"])
 
     def at_give(self, giver, getter, **kwargs):
         super().at_give(giver, getter, **kwargs)
-        hooks = self.db.quest_hooks["at_give"]
-        for qid in hooks:
-            for stage in hooks[qid]:
-                hook_data = hooks[qid][stage]
-                if getter.attributes.has("quest_stages") and getter.quests.at_stage(qid, stage):
-                    getter.msg(hook_data["msg"])
-                    getter.quests.advance_quest(hook_data["next_stage"])
+        if not getter.attributes.has("quest_stages"):
+            return
+        for qid, stage in getter.quests.stages_at(hook_stages(self, "at_give")):
+            hook_data = self.db.quest_hooks["at_give"][qid][stage]
+            getter.msg(hook_data["msg"])
+            getter.quests.advance_quest(hook_data["next_stage"])
 
 
 class LightItem(Item):
@@ -186,7 +186,7 @@ class Vendor(Character):
     def add_to_stock(self, prototype_key):
         """Add a prototype to the vendor's wares."""
         item = spawn(prototype_key)[0]
-        item.location = self
+        item.move_to(self, quiet=True, move_type="spawn")
         item.locks.add("get:perm(developer)")
         self.db.stock[item] = prototype_key
 
@@ -1,16 +1,19 @@
+from django.db import transaction
+from evennia.prototypes import spawner
 from evennia.utils.create import create_object, ObjectDB
 
 from server import appearance
 from typeclasses.inanimate.items.item_types.containers import Container
 from typeclasses.inanimate.gold import generate_gold_object
-from typeclasses.scripts.item_scripts import TemporarilyHide
+from typeclasses.scripts.item_scripts import hide
+from world.loot import roll_loot
 
 
 def make_corpse(entity):
     """
     Generates a corpse of the given entity and places it in the entity's location.
 
-    :param entity: A living entity whose name and contents are copied into the corpse.
+    :param entity: A living entity whose name, contents and loot table decide what's in the corpse.
     """
     if not entity.db.dies:
         entity.location.msg(appearance.warning + "Can't make a corpse of an entity that knocks out instead of dying!")
@@ -18,16 +21,20 @@ def make_corpse(entity):
 
     key = f"the corpse of {entity.get_display_name(article=True)}"
 
-    contents = [item for item in entity.contents if item.attributes.has("weight")]
-    if entity.db.gold:
-        contents.append(generate_gold_object(entity.db.gold))
+    # Only note what the corpse holds for now; the items are made if and when someone looks inside
+    prototypes, gold = roll_loot(entity.db.loot_table)
+    copies = []
+    for item in entity.contents:
+        if item.attributes.has("weight"):
+            prototype = item.tags.get(category="from_prototype")
+            if prototype:
+                prototypes.append(prototype)
+            else:
+                copies.append(item)
+    gold += entity.db.gold or 0
 
-    corpse = create_object(typeclass=Corpse, key=key, location=entity.location)
-
-    # Copy entity's items over to the corpse
-    for item in contents:
-        new_item = ObjectDB.objects.copy_object(item)
-        new_item.move_to(corpse, quiet=True)
+    create_object(typeclass=Corpse, key=key, location=entity.location,
+                  attributes=[("loot", {"prototypes": prototypes, "copies": copies, "gold": gold})])
 
 
 def set_to_respawn(entity):
@@ -44,7 +51,7 @@ def set_to_respawn(entity):
         return
 
     entity.move_to(entity.home)
-    entity.scripts.add(TemporarilyHide())
+    hide(entity, action="respawn")
     # Spawn new loot from table
 
 
@@ -54,3 +61,24 @@ class Corpse(Container):
         self.db.plural_name = True
         self.db.capacity = 20
         self.locks.add("get_from:all()")
+
+    def prepare_contents(self, looker):
+        """Create the corpse's loot the first time anyone looks in or takes from it, all in one transaction."""
+        loot = self.db.loot
+        if not loot:
+            return
+        loot = loot.deserialize()
+        self.db.loot = None
+
+        with transaction.atomic():
+            items = spawner.spawn(*loot["prototypes"]) if loot["prototypes"] else []
+            # Items that weren't spawned from a prototype are copied from the entity, which still has them
+            items += [ObjectDB.objects.copy_object(item) for item in loot["copies"] if item]
+            if loot["gold"]:
+                items.append(generate_gold_object(loot["gold"]))
+            for item in items:
+                item.move_to(self, quiet=True)
+
+    def get_display_things(self, looker, **kwargs):
+        self.prepare_contents(looker)
+        return super().get_display_things(looker, **kwargs)
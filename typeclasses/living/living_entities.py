@@ -7,6 +7,7 @@ from server import appearance
 from stats.stats_constants import BASE_CARRY_WEIGHT, BASE_CARRY_COUNT
 from typeclasses.base.objects import Object
 from typeclasses.inanimate.items.items import Item
+from world.locations.exit_graph import EXIT_GRAPH, DIRECTIONS
 
 
 class LivingEntity(Object, CombatEntity):
@@ -69,34 +70,26 @@ class LivingEntity(Object, CombatEntity):
             string = f"{self.get_display_name(capital=True, article=True, color=False)} "
 
         # Find the exit from there that leads here
-        exits = [
-            ex for ex in source_location.contents if ex.destination is self.location
-        ]
-
-        if len(exits) > 0:
-            exit = exits[0]
-            aliases = exit.aliases.all()
-            from_direction = None
+        direction, edge = EXIT_GRAPH.edge_to(source_location, self.location)
+        exit = EXIT_GRAPH.get(edge.exit) if edge else None
+
+        if exit:
             cardinal_opposites = {"north": "south", "south": "north", "east": "west", "west": "east",
                                   "northeast": "southwest",
                                   "northwest": "southeast", "southeast": "northwest", "southwest": "northeast"}
-            if exit.name in cardinal_opposites:
-                from_direction = cardinal_opposites[exit.name]
-            for alias in aliases:
-                if alias in cardinal_opposites:
-                    from_direction = cardinal_opposites[alias]
+            from_direction = cardinal_opposites.get(direction)
             if from_direction:  # Came from a cardinal direction
                 if not msg:
                     # "Lyrik arrives from the east."
                     string = string + f"arrives from the {from_direction}."
             else:
-                if exit.name == "up" or "up" in aliases:
+                if direction == "up":
                     string = string + "arrives from below."
-                elif exit.name == "down" or "down" in aliases:
+                elif direction == "down":
                     string = string + "arrives from above."
-                elif exit.name == "in" or "in" in aliases:
+                elif direction == "in":
                     string = string + "comes in."
-                elif "door" in exit.name or "door" in aliases:
+                elif "door" in exit.name or "door" in exit.aliases.all():
                     string = string + "arrives through the door."
                 else:
                     string = string + "arrives."
@@ -108,7 +101,7 @@ class LivingEntity(Object, CombatEntity):
         mapping.update(
             {
                 "object": self,
-                "exit": exits[0] if exits else "somewhere",
+                "exit": exit or "somewhere",
                 "origin": origin or "nowhere",
                 "destination": destination or "nowhere",
             }
@@ -156,22 +149,11 @@ class LivingEntity(Object, CombatEntity):
 
         # Find the exit that leads there
         location = self.location
-        exits = [
-            ex for ex in location.contents if ex.location is location and ex.destination is destination
-        ]
-
-        if len(exits) > 0:
-            exit = exits[0]
-            # Is the exit in a recognized direction?
-            directions = ["north", "south", "east", "west", "northeast", "northwest", "southeast", "southwest", "up",
-                          "down", "in", "out"]
-            # Check name
-            direction = exit.name if exit.name in directions else None
-            # Check aliases
-            for alias in exit.aliases.all():
-                if alias in directions:
-                    direction = alias
-            if direction:  # Exit is in a direction
+        direction, edge = EXIT_GRAPH.edge_to(location, destination)
+        exit = EXIT_GRAPH.get(edge.exit) if edge else None
+
+        if exit:
+            if direction in DIRECTIONS:  # Exit is in a direction
                 if not msg:
                     # "Lyrik goes east." "A hellhound goes out."
                     string = string + f"leaves {direction}."
@@ -187,7 +169,7 @@ class LivingEntity(Object, CombatEntity):
         mapping.update(
             {
                 "object": self,
-                "exit": exits[0] if exits else "somewhere",
+                "exit": exit or "somewhere",
                 "origin": location or "nowhere",
                 "destination": destination or "nowhere",
             }
@@ -203,27 +185,45 @@ class LivingEntity(Object, CombatEntity):
         else:
             return appearance.character
 
-    def carried_count(self):
-        carried_count = 0
+    # <editor-fold desc="Carrying">
+    def recount_carried(self):
+        """Count the unequipped items carried and their total weight from scratch, replacing the running totals."""
+        count, weight = 0, Dec(0)
         for item in self.contents:
-            if isinstance(item, Item):
-                if item.attributes.has("equipped") and item.db.equipped:
-                    continue
-                carried_count += 1
-        return carried_count
+            if isinstance(item, Item) and not item.db.equipped:
+                count += 1
+                weight += item.total_weight()
+        self.ndb.carried = [count, weight]
+        return count, weight
+
+    def carried(self):
+        """Returns [item count, weight] carried, counting from scratch only the first time since a reload."""
+        if self.ndb.carried is None:
+            self.recount_carried()
+        return self.ndb.carried
+
+    def carry_changed(self, count, weight):
+        """Adjust the running totals for items and weight picked up, put down, equipped or put into containers."""
+        if self.ndb.carried is not None:
+            self.ndb.carried[0] += count
+            self.ndb.carried[1] += weight
+
+    def carried_count(self):
+        return self.carried()[0]
 
     def encumbrance(self):
-        encumbrance = Dec(0)
-        for item in self.contents:
-            if isinstance(item, Item):
-                if item.attributes.has("equipped") and item.db.equipped:
-                    continue
-                if item.contents:
-                    for content in item.contents:
-                        encumbrance += content.db.weight
-                encumbrance += item.db.weight
-
-        return encumbrance
+        return self.carried()[1]
+
+    def at_object_receive(self, moved_obj, source_location, move_type="move", **kwargs):
+        super().at_object_receive(moved_obj, source_location, move_type, **kwargs)
+        if isinstance(moved_obj, Item) and not moved_obj.db.equipped:
+            self.carry_changed(1, moved_obj.total_weight())
+
+    def at_object_leave(self, moved_obj, target_location, move_type="move", **kwargs):
+        super().at_object_leave(moved_obj, target_location, move_type, **kwargs)
+        if isinstance(moved_obj, Item) and not moved_obj.db.equipped:
+            self.carry_changed(-1, -moved_obj.total_weight())
+    # </editor-fold>
 
     def table_carry_limits(self):
         table = EvTable(border=None)
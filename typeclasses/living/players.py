@@ -1,4 +1,4 @@
-from evennia.utils import lazy_property, delay
+from evennia.utils import lazy_property, delay, inherits_from
 
 from commands.character_cmdsets import PlayerCmdSet
 from commands.overloaded_cmdset import OverloadedCmdSet
@@ -81,6 +81,24 @@ class PlayerCharacter(Character):
             return
         if self.location.is_outdoors() and not source_location.is_outdoors():
             self.print_ambient(current_weather["ongoing_msg"])
+
+    def at_post_unpuppet(self, account=None, session=None, **kwargs):
+        location = self.location
+        super().at_post_unpuppet(account, session, **kwargs)
+        # Logging out takes the character out of the room without calling at_object_leave
+        if location and not self.location:
+            try:
+                location.unindex_content(self)
+                location.content_changed()
+            except AttributeError:
+                pass
+            # Stop sending the room weather updates if they were the last player there
+            try:
+                zone = location.zone()
+            except AttributeError:
+                zone = None
+            if zone and not any(inherits_from(content, PlayerCharacter) for content in location.contents):
+                zone.room_vacated(location)
     # </editor-fold>
 
     # <editor-fold desc="Stats">
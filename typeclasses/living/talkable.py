@@ -1,10 +1,11 @@
 import random
+from bisect import bisect_right
 
 from evennia import DefaultObject
 from evennia.utils import delay
 
 from server import appearance
-from world.quests.quest_hooks import print_dialogue_options
+from world.quests.quest_hooks import print_dialogue_options, hook_stages, dialogue_options, message_words
 
 
 class Talkable(DefaultObject):
@@ -17,13 +18,11 @@ class Talkable(DefaultObject):
     # <editor-fold desc="Quest Hook Functions">
     def at_object_receive(self, moved_obj, source_location, move_type="move", **kwargs):
         super().at_object_receive(moved_obj, source_location, move_type, **kwargs)
-        hooks = self.db.quest_hooks["at_object_receive"]
-        for qid in hooks:
-            for stage in hooks[qid]:
-                hook_data = hooks[qid][stage]
-                player = source_location
-                if player.attributes.has("quest_stages") and player.quests.at_stage(qid, stage):
-                    self.say_quest_lines(hook_data, player)
+        player = source_location
+        if not player or not player.attributes.has("quest_stages"):
+            return
+        for qid, stage in player.quests.stages_at(hook_stages(self, "at_object_receive")):
+            self.say_quest_lines(self.db.quest_hooks["at_object_receive"][qid][stage], player)
 
     def at_talk(self, player):
         """
@@ -35,16 +34,11 @@ class Talkable(DefaultObject):
 
         :param player: The player running the talk command.
         """
-        advanced = False
-        hooks = self.db.quest_hooks["at_talk"]
-        for qid in hooks:
-            for stage in hooks[qid]:
-                hook_data = hooks[qid][stage]
-                if player.quests.at_stage(qid, stage):  # Player is at a quest stage to talk to this NPC
-                    self.say_quest_lines(hook_data, player)
-                    advanced = True
-                    break # Stop checking hooks. One conversation/quest per command
-        if not advanced:
+        matches = player.quests.stages_at(hook_stages(self, "at_talk"))
+        if matches:  # Player is at a quest stage to talk to this NPC
+            qid, stage = matches[0]  # One conversation/quest per command
+            self.say_quest_lines(self.db.quest_hooks["at_talk"][qid][stage], player)
+        else:
             # Shows dialogue options if player is at an at_told hook for this NPC (but talked instead of told)
             if not self.at_told(player, ".", from_talk=True):
                 self.give_talk_response(player)  # Give a default or quest-progress-relevant greeting
@@ -63,32 +57,20 @@ class Talkable(DefaultObject):
             suppressed if the NPC has a talk response
         :return: Boolean whether the NPC registered a dialogue option and spoke lines.
         """
-        hooks = self.db.quest_hooks["at_told"]
-        stage_ready = False
+        matches = teller.quests.stages_at(hook_stages(self, "at_told"))
+        stage_ready = bool(matches)  # This NPC has a hook for a quest stage this player is at
         spoken = False
-        for qid in hooks:
-            if spoken:
-                break  # Stop checking hooks if we've already spoken
-            for stage in hooks[qid]:
-                if spoken:
-                    break
-                hook_data = hooks[qid][stage]
-                if teller.quests.at_stage(qid, stage):  # This NPC has a hook for a quest stage this player is at
-                    stage_ready = True
-                    for option in hook_data["options"]:  # Dialogue options the player can say
-                        all_keywords = False
-                        for keyword in option["keywords"]:
-                            all_keywords = True
-                            if keyword not in message.split(" "):  # Keyword missing from this dialogue option
-                                all_keywords = False
-                        if all_keywords:
-                            # All keywords in this dialogue option present in the message
-                            for line in option["spoken_lines"]:
-                                self.say_to(teller, line)
-                            spoken = True
-                            teller.quests.advance_quest(option["next_stage"])
-                            break  # from options list
-                    break  # Only handle one quest stage at a time
+        if stage_ready:
+            qid, stage = matches[0]  # Only handle one quest stage at a time
+            words = message_words(message)
+            for keywords, option in dialogue_options(self, qid, stage):  # Dialogue options the player can say
+                if keywords <= words:
+                    # All keywords in this dialogue option present in the message
+                    for line in option["spoken_lines"]:
+                        self.say_to(teller, line)
+                    spoken = True
+                    teller.quests.advance_quest(option["next_stage"])
+                    break  # from options list
         if not spoken:
             if not from_talk:  # Skip this if we're running from at_talk so NPC's talk response is said instead
                 self.say_to(teller, "Hmm?")
@@ -102,58 +84,85 @@ class Talkable(DefaultObject):
     # </editor-fold>
 
     # <editor-fold desc="Speaking Functions">
-    def find_highest_quest_response(self, player, responses):
+    def response_ladder(self, responses_attr):
+        """
+        Returns the NPC's talk responses or auto lines sorted for lookup, building them the first time since they last
+        changed. Every write to an Attribute, including 'set' and changes to part of it, stores a new pickled value, so
+        the ladder is rebuilt whenever that's no longer the value it was built from.
+
+        :param responses_attr: "talk_responses" or "auto_lines"
+        :return: List of (qid, ascending stage numbers, response lists for those stages), highest QID first
+        """
+        if self.ndb.response_ladders is None:
+            self.ndb.response_ladders = {}
+        attribute = self.attributes.get(responses_attr, return_obj=True)
+        stored = attribute.db_value if attribute else None
+        built_from, ladder = self.ndb.response_ladders.get(responses_attr, (None, None))
+        if ladder is not None and built_from is stored:
+            return ladder
+
+        responses = attribute.value if attribute else None
+        responses = responses.deserialize() if responses else {}
+        ladder = []
+        for qid in sorted(responses, reverse=True):
+            stages = sorted(stage for stage in responses[qid] if responses[qid][stage])
+            if stages:
+                ladder.append((qid, stages, [responses[qid][stage] for stage in stages]))
+        self.ndb.response_ladders[responses_attr] = (stored, ladder)
+        return ladder
+
+    def responses_changed(self):
+        """Call after changing the NPC's talk responses or auto lines."""
+        self.ndb.response_ladders = None
+
+    def find_highest_quest_response(self, player, responses_attr):
         """Spoken sets of lines are identified by which quest stage the player must have passed for the response to be
         spoken. This function finds the response corresponding to the highest number quest completed, or the furthest
         in story progression. Default responses are set to 0:0 to show to all created players."""
         # Find response for highest quest stage player has completed
-        sorted_qids = sorted(responses.keys(), reverse=True)
-
-        response = None
-        for qid in sorted_qids:
-            if response:
-                break
-            stages = responses[qid]
-            sorted_stage_nums = sorted(stages.keys(), reverse=True)
-            for stage in sorted_stage_nums:
-                if response:
-                    break
-                if player.db.quest_stages.get(qid, 0) >= stage:
-                    lst = responses[qid][stage]
-                    response = random.choice(lst)
-        return response
-
-    def find_and_say_lines(self, player, responses):
+        quest_stages = player.quests.data
+        for qid, stages, responses in self.response_ladder(responses_attr):
+            passed = bisect_right(stages, quest_stages.get(qid, 0))  # How many of these stages the player has reached
+            if passed:
+                return random.choice(responses[passed - 1])
+        return None
+
+    def say_lines(self, player, lines):
         """
         Speaks each line with a delay of 3 seconds between each. Returns the final count of 3-second delays so that
         further action in other functions can be timed correctly.
         """
-        response = self.find_highest_quest_response(player, responses)
         i = 0
-        for line in response:
+        for line in lines:
             delay(i * 3, self.say_to, player, line)
             i += 1
         # Subtract 1 to undo the extraneous incrementation from the previous line
         return i - 1
 
+    def find_and_say_lines(self, player, responses_attr):
+        """Speaks the response the player has progressed far enough for, returning the count of delays as say_lines."""
+        response = self.find_highest_quest_response(player, responses_attr)
+        if response is None:
+            return 0
+        return self.say_lines(player, response)
+
     def say_auto_lines(self, player):
         """Handles choosing and speaking lines that are automatically spoken when a player enters."""
-        responses = self.db.auto_lines
-        if not responses:
+        if not self.response_ladder("auto_lines"):
             return
-        self.find_and_say_lines(player, responses)
+        self.find_and_say_lines(player, "auto_lines")
 
     def give_talk_response(self, player):
         """Handles choosing and speaking lines that are said when a player uses the 'talk' command."""
-        responses = self.db.talk_responses
-        if not responses:
+        response = self.find_highest_quest_response(player, "talk_responses")
+        if response is None:
             player.msg(self.key + " doesn't have anything to say to you.")
             return
-        self.find_and_say_lines(player, responses)
+        self.say_lines(player, response)
 
     def say_quest_lines(self, hook_data, player):
         """Speaks the lines from the given quest hook one-by-one, with 3 seconds between each, then advances the quest."""
-        num_delays = self.find_and_say_lines(player, hook_data["spoken lines"])
+        num_delays = self.say_lines(player, hook_data["spoken_lines"])
         delay((num_delays)*3, player.quests.advance_quest, hook_data["next_stage"])
     # </editor-fold>
 
@@ -1,19 +1,100 @@
+"""
+Hiding objects for a while, i.e. defeated entities waiting to respawn.
+
+Every pending unhide or respawn is kept in one saved list of (wake time, object id, action) entries on the global
+"Hide Schedule" script, and run by the server's SCHEDULER, so there is no script or timer per hidden object. Whether
+an object is hidden is just a check of an in-memory set of ids, used by filter_visible and at_pre_get.
+"""
+from time import time
+
+import evennia
+from evennia.objects.models import ObjectDB
+from evennia.utils import inherits_from
+from evennia.utils.containers import GLOBAL_SCRIPTS
+
+from server.scheduler import SCHEDULER
 from typeclasses.scripts.scripts import Script
 
+HIDE_SECONDS = 120
 
-class TemporarilyHide(Script):
-    """Hides an item for 60 seconds."""
-    def at_script_creation(self):
-        self.interval = 120
-        # Only triggers once, but this seems the only way to use remaining_repeats and actually wait the interval
-        self.repeats = 2
-        self.orig_view = self.obj.locks.get("view")
-        self.orig_get = self.obj.locks.get("get")
-        self.obj.locks.add("view:false();get:false()")
+_hidden = set()  # Ids of hidden objects
+
+
+def is_hidden(obj):
+    return obj.id in _hidden
+
+
+def hide_schedule():
+    """Returns the global script holding the saved schedule, creating it if needed."""
+    script = GLOBAL_SCRIPTS.get("Hide Schedule")
+    if not script:
+        script = evennia.create_script(typeclass=Script, key="Hide Schedule", obj=None)
+        script.db.entries = []
+    return script
+
+
+def hide(obj, seconds=HIDE_SECONDS, action="unhide"):
+    """
+    Hide an object from view and from being taken for a while.
+
+    :param obj: Object to hide.
+    :param seconds: How long until it's shown again.
+    :param action: What happens when the time is up, from ACTIONS.
+    """
+    wake_time = time() + seconds
+    hide_schedule().db.entries.append((wake_time, obj.id, action))
+    _hidden.add(obj.id)
+    if obj.location:
+        obj.location.content_changed()
+    SCHEDULER.schedule_at(wake_time, wake, obj.id, action)
 
-    def at_repeat(self, **kwargs):
-        if self.remaining_repeats() == 0:
-            self.obj.locks.add(f"{self.orig_view};{self.orig_get}")
-            self.delete()
 
+def unhide(obj):
+    _hidden.discard(obj.id)
+    if obj.location:
+        obj.location.content_changed()
+
+
+def respawn(entity):
+    """Show a defeated entity again, back at full health."""
+    entity.db.hp = entity.get_max("hp")
+    unhide(entity)
+
+
+ACTIONS = {"unhide": unhide, "respawn": respawn}
+
+
+def wake(obj_id, action):
+    """Run a scheduled action, and remove its entry from the saved schedule."""
+    entries = hide_schedule().db.entries
+    for i, entry in enumerate(entries):
+        if entry[1] == obj_id and entry[2] == action:
+            del entries[i]
+            break
+    obj = ObjectDB.objects.get_id(obj_id)
+    if obj:
+        ACTIONS[action](obj)
+    else:
+        _hidden.discard(obj_id)
+
+
+def restore_hidden():
+    """Hide everything that was hidden before a reload, and schedule showing it again. Called at server start."""
+    for wake_time, obj_id, action in hide_schedule().db.entries:
+        _hidden.add(obj_id)
+        SCHEDULER.schedule_at(wake_time, wake, obj_id, action)
+
+
+class TemporarilyHide(Script):
+    """Replaced by hide(). Hides its object through the schedule instead and removes itself, for scripts added before
+    the change."""
 
+    def at_start(self, **kwargs):
+        # Put back the default view and get locks this script replaced with false()
+        self.obj.locks.add("view:all()")
+        if inherits_from(self.obj, "evennia.objects.objects.DefaultCharacter"):
+            self.obj.locks.add("get:false()")
+        else:
+            self.obj.locks.add("get:all()")
+        hide(self.obj)
+        self.delete()
@@ -1,23 +1,64 @@
+from time import time
+
+from evennia.prototypes import prototypes as protlib
 from evennia.prototypes import spawner
+from evennia.utils import logger
 
-from typeclasses.scripts.item_scripts import TemporarilyHide
+from server.scheduler import SCHEDULER
 from typeclasses.scripts.scripts import Script
 
+REPLENISH_SECONDS = 120
+
+_prototypes = {}  # prototype key -> prototype dict, so respawning doesn't search for it every time
+
+
+def cached_prototype(prototype_key):
+    try:
+        return _prototypes[prototype_key]
+    except KeyError:
+        _prototypes[prototype_key] = protlib.search_prototype(key=prototype_key)[0]
+        return _prototypes[prototype_key]
+
 
 # TODO: Time of day
 class ReplenishItem(Script):
-    """Spawns a new item from the given item's from_prototype when the given item has been removed from its original
-    location."""
+    """Spawns a new item from the given item's from_prototype REPLENISH_SECONDS after the given item is removed from
+    its original location. The room tells this script when the item leaves, so nothing runs while it sits there."""
 
     def at_script_creation(self):
-        self.interval = 10
         self.db.item = None
+        self.db.from_prototype = None
+        self.db.respawn_at = None
 
-    def at_repeat(self, **kwargs):
+    def at_start(self, **kwargs):
+        self.obj.ndb.replenishers = None  # Have the room look up its replenished items again
+
+    def at_server_start(self):
+        if self.interval:  # Left over from when replenishing was checked every 10 seconds
+            self.stop()
+        if self.db.respawn_at:
+            SCHEDULER.schedule_at(self.db.respawn_at, self.replenish)
+        elif self.db.item not in self.obj.contents:
+            # Taken while this was still polling, or deleted, so the room never said it left
+            if self.db.item or self.db.from_prototype:
+                self.item_taken()
+            else:
+                logger.log_err(f"ReplenishItem {self.dbref} on {self.obj} has lost its item and prototype.")
+
+    def item_taken(self):
+        """Called by the room when the item leaves it."""
         if not self.db.from_prototype:
             self.db.from_prototype = self.db.item.tags.get(category="from_prototype")
-        if self.db.item not in self.obj.contents:
-            new_obj = spawner.spawn(self.db.from_prototype)[0]
-            new_obj.move_to(self.obj, quiet=True)
-            new_obj.scripts.add(TemporarilyHide())
-            self.db.item = new_obj
+        self.db.item = None
+        self.obj.ndb.replenishers = None
+        self.db.respawn_at = time() + REPLENISH_SECONDS
+        SCHEDULER.schedule_at(self.db.respawn_at, self.replenish)
+
+    def replenish(self):
+        if not self.pk or not self.db.respawn_at:  # Deleted, or already replenished
+            return
+        new_obj = spawner.spawn(cached_prototype(self.db.from_prototype))[0]
+        new_obj.move_to(self.obj, quiet=True)
+        self.db.item = new_obj
+        self.db.respawn_at = None
+        self.obj.ndb.replenishers = None
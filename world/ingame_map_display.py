@@ -6,9 +6,11 @@ You can easily alter it to add special characters, room colors etc. The map show
 dynamically generated on use, and supports all compass directions and up/down. Other
 directions are ignored.
 
-If you don't expect the map to be updated frequently, you could choose to save the
-calculated map as a .ndb value on the room and render that instead of running mapping
-calculations anew each time.
+The map drawn around each room is cached on its area's ndb and reused until
+invalidate_maps() is called for a room it includes, which exits do when they are
+created or deleted, and the env command does when room environments change. Each
+cached map remembers which doors its viewer could pass, and is only shown to
+viewers who can pass the same ones. Only the player's X is drawn fresh on each call.
 
 An example map:
 ```
@@ -60,14 +62,21 @@ arguments passed into the Map command.
 import time
 
 from django.conf import settings
-from evennia.commands.default.muxcommand import MuxCommand
 
+from commands.command import MuxCommand
 from server import appearance
-from world.locations.exits import Door
+from world.locations.exit_graph import EXIT_GRAPH
 
 _BASIC_MAP_SIZE = settings.BASIC_MAP_SIZE if hasattr(settings, "BASIC_MAP_SIZE") else 10
 _MAX_MAP_SIZE = settings.BASIC_MAP_SIZE if hasattr(settings, "MAX_MAP_SIZE") else 10
 
+# Bumped when maps everywhere may have changed, i.e. after rebuilding the exit graph, so every cached map layer is
+# rebuilt on next use. Changes to particular rooms bump their areas' map_version instead.
+_MAP_VERSION = 0
+
+# How many layers are kept for the same room and size, for viewers who can pass through different exits
+MAP_LAYERS_PER_ROOM = 4
+
 # TODO: Show only one grid space worth of exits between each room
 
 # _COMPASS_DIRECTIONS specifies which way to move the pointer on the x/y axes and what characters to use to depict the exits on the map.
@@ -85,6 +94,22 @@ _COMPASS_DIRECTIONS = {
 }
 
 
+def invalidate_maps(*rooms):
+    """
+    Call after creating, deleting or changing exits, or changing how rooms appear on the map.
+
+    :param rooms: Rooms whose exits or appearance changed. Only map layers including rooms in their areas are rebuilt.
+        With none given, or for rooms outside any area, every map layer is.
+    """
+    global _MAP_VERSION
+    areas = [room.db.area if room else None for room in rooms]
+    if not areas or not all(areas):
+        _MAP_VERSION += 1
+        return
+    for area in areas:
+        area.ndb.map_version = (area.ndb.map_version or 0) + 1
+
+
 def room_colors(room):
     color_dict = room.room_appearance()
     if not color_dict:
@@ -103,7 +128,8 @@ class Map(object):
         Args:
             caller (object): Any object, though generally a puppeted character.
             size (int): The seed size of the map, which will be multiplied to get the final grid size.
-            location (object): The location at the map's center (will default to caller.location if none provided).
+            location (object): The location at the map's center, marked with the X (will default to caller.location if
+                none provided).
         """
         self.start_time = time.time()
         self.caller = caller
@@ -114,6 +140,8 @@ class Map(object):
         self.curY = None
         self.size = size
         self.location = location or caller.location
+        self.center = None
+        self.locks = []  # (room id, exit id, whether the caller could pass) for each exit lock checked while drawing
 
     def create_grid(self):
         """
@@ -129,21 +157,6 @@ class Map(object):
                 board[row].extend([" ", "   ", " "])
         return board
 
-    def exit_ordinal(self, ex):
-        """
-        Get the exit name as a compass direction if possible
-
-        Args:
-            ex (Exit): The current exit being mapped.
-        Returns:
-            string: The exit name as a compass direction or an empty string.
-        """
-        return (
-            ex.name
-            if ex.name in _COMPASS_DIRECTIONS
-            else next((alias for alias in ex.aliases.all() if alias in _COMPASS_DIRECTIONS), "")
-        )
-
     def update_pos(self, room, exit_name):
         """
         Update the position pointer.
@@ -189,16 +202,20 @@ class Map(object):
             return
 
         # Check if the caller has access to the room in question. If not, don't draw it.
-        # Additionally, if the name of the exit is not ordinal but an alias of it is, use that.
-        for ex in [x for x in room.exits if x.access(self.caller, "traverse")]:
-            ex_name = self.exit_ordinal(ex)
-            if not ex_name or ex_name in ["up", "down"]:
+        for edge in EXIT_GRAPH.edges(room):
+            ex_name = edge.direction
+            if ex_name not in _COMPASS_DIRECTIONS or ex_name in ["up", "down"]:
                 continue
-            if self.has_drawn(ex.destination):
+            can_traverse = EXIT_GRAPH.can_traverse(edge, self.caller)
+            self.locks.append((room.id, edge.exit, can_traverse))
+            if not can_traverse:
+                continue
+            destination = EXIT_GRAPH.get(edge.destination)
+            if self.has_drawn(destination):
                 continue
 
-            self.update_pos(room, ex_name.lower())
-            self.draw_room_on_map(ex.destination, max_distance - 1)
+            self.update_pos(room, ex_name)
+            self.draw_room_on_map(destination, max_distance - 1)
 
     # TODO: Draw corner exits without gaps
     def draw_exits(self, room):
@@ -209,12 +226,12 @@ class Map(object):
             room (Room): The room to draw exits of.
         """
         room_x, room_y = self.curX, self.curY
-        for ex in room.exits:
-            ex_name = self.exit_ordinal(ex)
-            if not ex_name:
+        for edge in EXIT_GRAPH.edges(room):
+            ex_name = edge.direction
+            if ex_name not in _COMPASS_DIRECTIONS:
                 continue
 
-            exit_color = appearance.door if isinstance(ex, Door) else room_colors(room)[0]
+            exit_color = appearance.door if edge.is_door else room_colors(room)[0]
             ex_character = exit_color + ("   " if ex_name in ("south", "north") else " ") + "|n"
             exit_x = room_x + int(_COMPASS_DIRECTIONS[ex_name][1] / 3)
             exit_y = room_y + int(_COMPASS_DIRECTIONS[ex_name][0] / 3)
@@ -261,24 +278,26 @@ class Map(object):
             right_barrier (str): The last character of the 3-character room depiction.
             char (str): Defaults to none, a special character depicting the room.
         """
-        if room == self.caller.location:
-            char = "X"  # Show the player in their current room
+        if room == self.location:
+            # Remember how the center was drawn, so the player's X can be laid over it without caching it in the layer
+            self.center = (x, y, left_barrier, right_barrier)
 
+        self.grid[x][y] = self.tile(room, left_barrier, right_barrier, char)
+
+    def tile(self, room, left_barrier="[", right_barrier="]", char=None):
+        """Returns the 3-character depiction of a room."""
         bg_color, fg_color, player_color = room_colors(room)
         if not player_color:
             player_color = "|r"
         char_appearance = bg_color + player_color if char == "X" else bg_color + fg_color
         wall_appearance = fg_color + bg_color
 
-
-        tile = (
+        return (
             f"{wall_appearance}{left_barrier}|n"
             f"{char_appearance}{char if char else " "}|n"
             f"{wall_appearance}{right_barrier}|n"
         )
 
-        self.grid[x][y] = tile
-
     def start_loc_on_grid(self, room):
         """
         Set the starting location on the grid based on the maximum width and length
@@ -292,6 +311,60 @@ class Map(object):
         self.render_room(room, x, y)
         self.curX, self.curY = x, y
 
+    def build_layer(self):
+        """
+        Draw the map around the location, without the player's X.
+
+        Returns:
+            dict: The finished rows as strings, except for the center room's row, which is kept as a list of tiles
+                so the X can be laid over it.
+        """
+        self.grid = self.create_grid()
+        self.draw_room_on_map(self.location, self.size)
+
+        center_x = self.center[0]
+        rows = []
+        for i, row in enumerate(self.grid):
+            rows.append(row if i == center_x else "".join(row))
+        areas = {room.db.area for room in self.has_mapped}
+        return {"version": _MAP_VERSION, "areas": {area: area.ndb.map_version or 0 for area in areas if area},
+                "locks": self.locks, "rows": rows, "center": self.center}
+
+    def layer_fits(self, layer):
+        """
+        Whether a cached layer can be shown to the caller: no area it covers has changed since it was drawn, and the
+        caller passes the same exit locks it was drawn with, i.e. doors have the same ones open.
+        """
+        if layer["version"] != _MAP_VERSION:
+            return False
+        if any((area.ndb.map_version or 0) != version for area, version in layer["areas"].items()):
+            return False
+        for room_id, exit_id, can_traverse in layer["locks"]:
+            edge = EXIT_GRAPH.rooms.get(room_id, {}).get(exit_id)
+            if not edge or EXIT_GRAPH.can_traverse(edge, self.caller) != can_traverse:
+                return False
+        return True
+
+    def get_layer(self):
+        """
+        Returns the map layer around the location, from its area's cache if one fits the caller. A few layers are kept
+        for each room, since what's drawn depends on the exits the viewer can pass through.
+        """
+        area = self.location.db.area
+        if not area:  # Delocalized rooms aren't cached
+            return self.build_layer()
+
+        if area.ndb.map_layers is None:
+            area.ndb.map_layers = {}
+        layers = area.ndb.map_layers.setdefault((self.location, self.size), [])
+        for layer in layers:
+            if self.layer_fits(layer):
+                return layer
+        layer = self.build_layer()
+        layers.append(layer)
+        del layers[:-MAP_LAYERS_PER_ROOM]  # Dropping the oldest
+        return layer
+
     def show_map(self, debug=False):
         """
         Create and show the map, piecing it all together in the end
@@ -299,14 +372,17 @@ class Map(object):
         Args:
             debug (bool): Whether or not to return the time taken to build the map.
         """
-        map_string = ""
-        self.grid = self.create_grid()
-        self.draw_room_on_map(self.location, self.size)
+        layer = self.get_layer()
+        center_x, center_y, left_barrier, right_barrier = layer["center"]
 
-        for row in self.grid:
-            map_row = "".join(row)
-            if map_row.strip() != "":
-                map_string += f"{map_row}\n"
+        map_string = ""
+        for i, row in enumerate(layer["rows"]):
+            if i == center_x:
+                row = list(row)
+                row[center_y] = self.tile(self.location, left_barrier, right_barrier, char="X")
+                row = "".join(row)
+            if row.strip() != "":
+                map_string += f"{row}\n"
 
         elapsed = time.time() - self.start_time
         if debug:
@@ -0,0 +1,142 @@
+"""
+A server-wide graph of which rooms lead where, so that movement, the map and room descriptions can look up a room's
+exits by direction without searching its contents and querying each exit's aliases.
+
+The graph is built from the database when the server starts and kept in sync by the Exit and Door hooks. If it ever
+drifts (i.e. after changing an exit's aliases or destination by hand), locations/reindex rebuilds it.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+
+from evennia.objects.models import ObjectDB
+from evennia.utils import logger, inherits_from
+
+# Exit names (or aliases) recognized as directions, in the order they're checked
+DIRECTIONS = ("north", "south", "east", "west", "northeast", "northwest", "southeast", "southwest", "up", "down", "in",
+              "out")
+
+# Everything needed to decide whether and where an exit can be taken, without loading the exit itself
+ExitEdge = namedtuple("ExitEdge", ["direction", "destination", "exit", "is_door", "traverse_lock"])
+
+
+def exit_direction(ex):
+    """Returns the direction an exit leads, from its name or else its aliases, or its key if it has no direction."""
+    if ex.key.lower() in DIRECTIONS:
+        return ex.key.lower()
+    return next((alias for alias in ex.aliases.all() if alias in DIRECTIONS), ex.key.lower())
+
+
+class ExitGraph:
+    """Room id -> {exit id: ExitEdge} for every exit in the world. Keyed by exit rather than direction, since a room
+    can have more than one exit the same way."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.build_time = None
+        self.version = 0  # Bumped on every change, so anything computed from the graph knows when to recompute
+        # Bumped only when exits are added, removed or lead somewhere else, and not when doors open or close, for
+        # things like routes that check locks as they use them
+        self.topology_version = 0
+        self.deferring = False  # Whether exits are being created in bulk, to be added by one build() afterward
+
+    def build(self):
+        """Rebuild the whole graph from the database, logging how long it took."""
+        start = perf_counter()
+        self.rooms = {}
+        self.version += 1
+        self.topology_version += 1
+        # Exits are the only objects with destinations
+        for ex in ObjectDB.objects.filter(db_location__isnull=False, db_destination__isnull=False):
+            self.add_exit(ex)
+        self.build_time = perf_counter() - start
+        logger.log_info(f"Exit graph: {self.num_exits()} exits in {len(self.rooms)} rooms built in "
+                        f"{self.build_time * 1000:.1f}ms")
+        return self.rooms
+
+    def num_exits(self):
+        return sum(len(edges) for edges in self.rooms.values())
+
+    # <editor-fold desc="Syncing">
+    @contextmanager
+    def deferred(self):
+        """Ignore changes to single exits while creating many at once. Call build() afterward."""
+        self.deferring = True
+        try:
+            yield
+        finally:
+            self.deferring = False
+
+    def add_exit(self, ex):
+        """Add or update an exit, i.e. after it's created or its traverse lock changes."""
+        if self.deferring:
+            return
+        if not ex.location or not ex.destination:
+            self.remove_exit(ex)
+            return
+        edge = ExitEdge(direction=exit_direction(ex), destination=ex.destination.id, exit=ex.id,
+                        is_door=inherits_from(ex, "world.locations.exits.Door"),
+                        traverse_lock=ex.locks.get("traverse"))
+        old_edge = self.rooms.get(ex.location.id, {}).get(ex.id)
+        if not old_edge or old_edge._replace(traverse_lock=edge.traverse_lock) != edge:
+            self.remove_exit(ex)
+            self.topology_version += 1
+        self.version += 1
+        self.rooms.setdefault(ex.location.id, {})[ex.id] = edge
+
+    def remove_exit(self, ex):
+        if self.deferring:
+            return
+        room_ids = [ex.location.id] if ex.location else list(self.rooms)
+        for room_id in room_ids:
+            edges = self.rooms.get(room_id, {})
+            if edges.pop(ex.id, None):
+                self.version += 1
+                self.topology_version += 1
+            if room_id in self.rooms and not edges:
+                del self.rooms[room_id]
+
+    def remove_room(self, room):
+        if self.rooms.pop(room.id, None) is not None:
+            self.version += 1
+            self.topology_version += 1
+
+    # </editor-fold>
+
+    # <editor-fold desc="Lookups">
+    def edges(self, room):
+        """Returns the ExitEdge for every exit out of the room."""
+        if not room:
+            return []
+        return self.rooms.get(room.id, {}).values()
+
+    def edge(self, room, direction):
+        """Returns the first exit out of the room in the given direction, or None."""
+        return next((edge for edge in self.edges(room) if edge.direction == direction), None)
+
+    def edge_to(self, room, destination):
+        """Returns (direction, ExitEdge) for the first exit from room to destination, or (None, None)."""
+        if not destination:
+            return None, None
+        for edge in self.edges(room):
+            if edge.destination == destination.id:
+                return edge.direction, edge
+        return None, None
+
+    @staticmethod
+    def get(obj_id):
+        """Returns the object (room or exit) with the given id from the object cache."""
+        return ObjectDB.objects.get_id(obj_id)
+
+    def can_traverse(self, edge, traverser):
+        """Whether the traverser passes the exit's traverse lock, checking the exit itself only for unusual locks."""
+        if edge.traverse_lock == "traverse:all()":
+            return True
+        if edge.traverse_lock == "traverse:false()":  # Closed doors
+            return bool(getattr(traverser, "is_superuser", False))
+        return self.get(edge.exit).access(traverser, "traverse")
+
+    # </editor-fold>
+
+
+EXIT_GRAPH = ExitGraph()
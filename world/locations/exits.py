@@ -12,6 +12,8 @@ from evennia.contrib.grid.simpledoor import SimpleDoor
 from evennia.objects.objects import DefaultExit
 
 from typeclasses.base.objects import Object
+from world.ingame_map_display import invalidate_maps
+from world.locations.exit_graph import EXIT_GRAPH
 
 
 class Exit(Object, DefaultExit):
@@ -25,6 +27,18 @@ class Exit(Object, DefaultExit):
 
     """
 
+    def at_object_post_creation(self):
+        # Aliases are only set after at_object_creation, so wait until now to add this to the exit graph
+        super().at_object_post_creation()
+        if not EXIT_GRAPH.deferring:  # Otherwise the graph is built and maps cleared once all exits are created
+            EXIT_GRAPH.add_exit(self)
+            invalidate_maps(self.location)
+
+    def at_object_delete(self):
+        EXIT_GRAPH.remove_exit(self)
+        invalidate_maps(self.location)
+        return super().at_object_delete()
+
     # Overloaded to ignore fail to move rooms when we're in combat and just trying to move on battlefield grid
     def at_failed_traverse(self, traversing_object, **kwargs):
         """
@@ -49,3 +63,17 @@ class Door(Exit, SimpleDoor):
     def at_object_creation(self, **kwargs):
         super().at_object_creation()
         self.locks.add("traverse:false()")
+        # Also re-run when an existing exit is made into a door
+        if not EXIT_GRAPH.deferring:
+            EXIT_GRAPH.add_exit(self)
+            invalidate_maps(self.location)
+
+    def setlock(self, lockstring):
+        """Opening or closing a door changes whether it can be traversed, so update the exit graph. Cached maps check
+        door locks as they're shown, so they don't need rebuilding."""
+        super().setlock(lockstring)
+        EXIT_GRAPH.add_exit(self)
+        self.location.content_changed()
+        if self.db.return_exit:
+            EXIT_GRAPH.add_exit(self.db.return_exit)
+            self.db.return_exit.location.content_changed()
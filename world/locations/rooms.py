@@ -8,11 +8,41 @@ from server import appearance
 from server.appearance import ENVIRONMENTS_BY_TYPE
 from server.funcparser import MyFuncParser, MY_ACTOR_STANCE_CALLABLES
 from typeclasses.base.objects import Object
-from typeclasses.inanimate.fixtures import Fixture, Fountain, Well
+from typeclasses.inanimate.fixtures import Fixture, Fireplace, Fountain, Well
+from typeclasses.scripts.item_scripts import is_hidden
+from typeclasses.scripts.room_scripts import ReplenishItem
 from typeclasses.scripts.weather import RAINING
+from world.locations.exit_graph import EXIT_GRAPH
+from world.quests.quest_hooks import hook_stages
 
 _MSG_CONTENTS_PARSER = MyFuncParser(MY_ACTOR_STANCE_CALLABLES)
 
+# Bumped whenever the location tree is rearranged, so every room knows to refresh its cached hierarchy
+_HIERARCHY_VERSION = 0
+
+
+def hierarchy_changed():
+    """Call after changing any room's area, or any area's, locality's or zone's parent."""
+    global _HIERARCHY_VERSION
+    _HIERARCHY_VERSION += 1
+
+
+def hierarchy_version():
+    return _HIERARCHY_VERSION
+
+
+_indexed_classes = {}  # typeclass -> the classes its objects are indexed under in content_index()
+
+
+def indexed_classes(typeclass):
+    """Returns the classes in a typeclass's MRO that are defined in the game, leaving out Evennia's and Django's."""
+    try:
+        return _indexed_classes[typeclass]
+    except KeyError:
+        _indexed_classes[typeclass] = [cls for cls in typeclass.__mro__
+                                       if not cls.__module__.startswith(("evennia.", "django.", "builtins"))]
+        return _indexed_classes[typeclass]
+
 
 class Room(Object, DefaultRoom):
     """
@@ -31,41 +61,94 @@ class Room(Object, DefaultRoom):
 
         self.db.environment = None
 
-        self.db.current_weather = None
-
         self.db.quest_hooks = {"at_object_receive": {}}
 
     def at_object_delete(self):
-        # Remove this room from the area containing it
+        # Remove this room from its zone's coordinates and the area containing it
+        zone = self.zone()
+        if zone:
+            zone.unindex_room(self)
         if self.db.area:
             self.db.area.db.rooms.remove(self)
+        EXIT_GRAPH.remove_room(self)
         return True
 
     def at_object_receive(self, moved_obj, source_location, move_type="move", **kwargs):
         super().at_object_receive(moved_obj, source_location, move_type, **kwargs)
+        self.index_content(moved_obj)
+        self.content_changed()
 
         if inherits_from(moved_obj, "typeclasses.living.players.PlayerCharacter"):
+            zone = self.zone()
+            if zone:
+                zone.room_occupied(self)
+
             # If any quest is advanced by entering this room, advance it
-            hooks = self.db.quest_hooks["at_object_receive"]
-            for qid in hooks:
-                for stage in hooks[qid]:
-                    hook_data = hooks[qid][stage]
-                    if moved_obj.attributes.has("quest_stages") and moved_obj.quests.at_stage(qid, stage):
-                        moved_obj.msg(hook_data["msg"])
-                        moved_obj.quests.advance_quest(hook_data["next_stage"])
-
-            # If any NPCs in the room speak automatically when someone enters, have them speak
-            for content in self.contents:
-                if content.db.auto_lines:
-                    delay(1, content.say_auto_lines, moved_obj)
-                # Start a battle with any hostiles in the room when a player enters
-                if content.db.hostile_to_players and hasattr(content, "ai"):
-                    delay(1, content.db.ai.start_fight)
+            if moved_obj.attributes.has("quest_stages"):
+                for qid, stage in moved_obj.quests.stages_at(hook_stages(self, "at_object_receive")):
+                    hook_data = self.db.quest_hooks["at_object_receive"][qid][stage]
+                    moved_obj.msg(hook_data["msg"])
+                    moved_obj.quests.advance_quest(hook_data["next_stage"])
+
+            # Greet new arrivals after a moment, once for everyone arriving together
+            if self.greeters():
+                if self.ndb.arrivals:
+                    self.ndb.arrivals.append(moved_obj)
+                else:
+                    self.ndb.arrivals = [moved_obj]
+                    delay(1, self.at_arrivals)
 
         # Destroy any abilties that are dropped
         elif inherits_from(moved_obj, Ability):
             moved_obj.delete()
 
+    def at_object_leave(self, moved_obj, target_location, move_type="move", **kwargs):
+        super().at_object_leave(moved_obj, target_location, move_type, **kwargs)
+        self.unindex_content(moved_obj)
+        self.content_changed()
+
+        # Start the timer to replace items this room replenishes
+        replenisher = self.replenishers().get(moved_obj.id)
+        if replenisher:
+            replenisher.item_taken()
+
+        # Stop sending this room weather updates once the last player leaves
+        if inherits_from(moved_obj, "typeclasses.living.players.PlayerCharacter"):
+            zone = self.zone()
+            if zone and not any(inherits_from(content, "typeclasses.living.players.PlayerCharacter")
+                                for content in self.contents if content != moved_obj):
+                zone.room_vacated(self)
+
+    # <editor-fold desc="Greeters">
+    def greeters(self):
+        """NPCs here that speak automatically when a player enters."""
+        if self.ndb.greeters is None:
+            self.ndb.greeters = [content for content in self.contents if content.db.auto_lines]
+        return self.ndb.greeters
+
+    def npc_moved(self, obj):
+        if (inherits_from(obj, "stats.combat_entity.CombatEntity")
+                and not inherits_from(obj, "typeclasses.living.players.PlayerCharacter")):
+            self.npcs_changed()
+
+    def npcs_changed(self):
+        """Call when an NPC enters or leaves, or changes whether it greets players, to find the greeters again."""
+        self.ndb.greeters = None
+
+    def at_arrivals(self):
+        """Has greeters speak to each player who arrived in the last moment."""
+        arrivals = [player for player in self.ndb.arrivals or [] if player.location == self]
+        self.ndb.arrivals = None
+        if not arrivals:
+            return
+        for greeter in self.greeters():
+            if is_hidden(greeter):
+                continue
+            for player in arrivals:
+                greeter.say_auto_lines(player)
+
+    # </editor-fold>
+
     # <editor-fold desc="Properties">
     @lazy_property
     def x(self):
@@ -79,18 +162,49 @@ class Room(Object, DefaultRoom):
     def z(self):
         return self.db.coordinates[2]
 
+    def set_coordinates(self, x, y, z):
+        """Set this room's coordinates, keeping its zone's coordinate index up to date."""
+        zone = self.zone()
+        if zone:
+            zone.unindex_room(self)
+        self.db.coordinates = (x, y, z)
+        for prop in ("x", "y", "z"):  # Clear the cached lazy properties
+            self.__dict__.pop(prop, None)
+        if zone:
+            zone.index_room(self)
+
     # These methods jump up the location hierarchy tree.
+    def hierarchy(self):
+        """
+        Returns this room's (area, locality, zone, region), walking up the tree only when the tree has changed since
+        it was last cached.
+        """
+        cached = self.ndb.hierarchy
+        if cached and cached[0] == _HIERARCHY_VERSION:
+            return cached[1]
+
+        area = self.db.area
+        locality = area.db.locality if area else None
+        zone = locality.db.zone if locality else None
+        region = zone.db.region if zone else None
+        self.ndb.hierarchy = (_HIERARCHY_VERSION, (area, locality, zone, region))
+        return area, locality, zone, region
+
     def locality(self):
-        if self.db.area:
-            return self.db.area.db.locality
+        return self.hierarchy()[1]
 
     def zone(self):
-        if self.locality():
-            return self.locality().db.zone
+        return self.hierarchy()[2]
 
     def region(self):
-        if self.zone():
-            return self.zone().db.region
+        return self.hierarchy()[3]
+
+    def current_weather(self):
+        """The zone's weather if this room is outdoors, otherwise None."""
+        zone = self.zone()
+        if zone and self.is_outdoors():
+            return zone.db.current_weather
+        return None
 
     def is_outdoors(self):
         if self.db.environment in ("wood room", "stone room", "cave"):
@@ -98,6 +212,9 @@ class Room(Object, DefaultRoom):
         else:
             return True
 
+    def has_fireplace(self):
+        return bool(self.in_room(Fireplace))
+
     def has_water(self):
         if self.db.environment in ENVIRONMENTS_BY_TYPE["shallow water"] + ENVIRONMENTS_BY_TYPE["deep water"]:
             return True
@@ -109,7 +226,7 @@ class Room(Object, DefaultRoom):
         if well and not well.db.empty:
             return True
 
-        if self.db.current_weather == RAINING:
+        if self.current_weather() == RAINING:
             return True
 
         return False
@@ -127,10 +244,36 @@ class Room(Object, DefaultRoom):
 {exits}
         """
 
+    def content_changed(self):
+        """
+        Call when anything that shows in this room's description changes - objects arriving or leaving, locks
+        changing what can be seen, etc. - so the cached description sections are rebuilt on the next look.
+        """
+        self.ndb.content_version = (self.ndb.content_version or 0) + 1
+
+    def cached_section(self, section, looker, build):
+        """
+        Returns a section of the room's description, building it only if the room's contents have changed since it
+        was last built for a looker of the same permission class. Superusers see past view locks, so they get their own.
+
+        Args:
+            section (str): Name of the section, i.e. "exits".
+            looker (DefaultObject): Object doing the looking.
+            build (callable): Builds the section when it isn't cached.
+        """
+        version = self.ndb.content_version or 0
+        if self.ndb.appearance_version != version:
+            self.ndb.appearance_cache = {}
+            self.ndb.appearance_version = version
+        key = (section, bool(getattr(looker, "is_superuser", False)))
+        if key not in self.ndb.appearance_cache:
+            self.ndb.appearance_cache[key] = build()
+        return self.ndb.appearance_cache[key]
+
+    # Not cached, since it's only the fixtures' descs and those can be edited without the room hearing about it
     def get_display_footer(self, looker, **kwargs):
         """Describes room fixtures like portals."""
-        fixtures = self.filter_visible([content for content in self.contents if isinstance(content, Fixture)], looker,
-                                       **kwargs)
+        fixtures = self.filter_visible(self.contents_of(Fixture), looker, **kwargs)
         string = ""
         first_line = True
         for fixture in fixtures:
@@ -153,23 +296,20 @@ class Room(Object, DefaultRoom):
             str: The character display data.
 
         """
-        characters = self.filter_visible(
-            self.contents_get(content_type="character"), looker, **kwargs
-        )
-        string = ""
-        first_line = True
-        for character in characters:
-            if first_line:
-                string = character.get_display_name(article=True, capital=True) + " " + character.db.appear_string
-                first_line = False
-            else:
-                string = (string + "\n" +
-                          character.get_display_name(article=True, capital=True) + " " + character.db.appear_string)
-
-        return string
+        # Cached with the looker included so every character here can share it, and the looker left out afterward
+        lines = self.cached_section("characters", looker, lambda: [
+            (character, character.get_display_name(article=True, capital=True) + " " + character.db.appear_string)
+            for character in self.contents_get(content_type="character")
+            if not is_hidden(character) and character.access(looker, "view")])
+        return "\n".join(line for character, line in lines if character != looker)
 
     # Overridden to add color
     def get_display_exits(self, looker, **kwargs):
+        if kwargs.get("exit_order"):
+            return self.build_display_exits(looker, **kwargs)
+        return self.cached_section("exits", looker, lambda: self.build_display_exits(looker, **kwargs))
+
+    def build_display_exits(self, looker, **kwargs):
         """
         Get the 'exits' component of the object description. Called by `return_appearance`.
 
@@ -202,7 +342,7 @@ class Room(Object, DefaultRoom):
             names.sort(key=lambda name: sort_index.get(name, end_pos))
             return names
 
-        exits = self.filter_visible(self.contents_get(content_type="exit"), looker, **kwargs)
+        exits = self.filter_visible([EXIT_GRAPH.get(edge.exit) for edge in EXIT_GRAPH.edges(self)], looker, **kwargs)
 
         # Check if player can move in every lateral direction, so exit names can be condensed
         all_lateral_directions = False
@@ -221,6 +361,9 @@ class Room(Object, DefaultRoom):
 
     # Overridden to exclude Fixtures
     def get_display_things(self, looker, **kwargs):
+        return self.cached_section("things", looker, lambda: self.build_display_things(looker, **kwargs))
+
+    def build_display_things(self, looker, **kwargs):
         """
         Get the 'things' component of the object description. Called by `return_appearance`.
 
@@ -396,17 +539,60 @@ class Room(Object, DefaultRoom):
 
     # </editor-fold>
 
+    # <editor-fold desc="Contents">
+    def content_index(self):
+        """
+        Returns this room's contents indexed by the game classes they inherit from, i.e. {Fixture: [fountain, well]},
+        building it from the room's contents if it hasn't been since the server started.
+        """
+        if self.ndb.content_index is None:
+            index = {}
+            for content in self.contents:
+                for cls in indexed_classes(type(content)):
+                    index.setdefault(cls, []).append(content)
+            self.ndb.content_index = index
+        return self.ndb.content_index
+
+    def index_content(self, obj):
+        for cls in indexed_classes(type(obj)):
+            objs = self.content_index().setdefault(cls, [])
+            if obj not in objs:
+                objs.append(obj)
+        self.npc_moved(obj)
+
+    def unindex_content(self, obj):
+        index = self.content_index()
+        for cls, objs in list(index.items()):  # Every class, in case its typeclass was swapped after indexing
+            if obj in objs:
+                objs.remove(obj)
+                if not objs:
+                    del index[cls]
+        self.npc_moved(obj)
+
+    def contents_of(self, typeclass: type):
+        """Returns all objects of the given type in this room."""
+        # Objects can still leave without the room hearing about it, i.e. when their location is set directly
+        return [obj for obj in self.content_index().get(typeclass, [])
+                if obj.location == self and isinstance(obj, typeclass)]
+
+    def replenishers(self):
+        """Returns {item id: ReplenishItem script} for the items in this room that are replaced when taken."""
+        if self.ndb.replenishers is None:
+            self.ndb.replenishers = {script.db.item.id: script for script in self.scripts.all()
+                                     if isinstance(script, ReplenishItem) and script.db.item}
+        return self.ndb.replenishers
+
     def in_room(self, typeclass: type):
         """Returns the first object of the given type found in this room."""
-        for content in self.contents:
-            if isinstance(content, typeclass):
-                return content
+        objs = self.contents_of(typeclass)
+        return objs[0] if objs else None
+
+    # </editor-fold>
 
     def update_weather(self, weather):
-        """Messages characters about the new weather if they are outside."""
-        self.db.current_weather = weather
-        for content in self.contents:
-            if content.location.is_outdoors():
+        """Messages characters about the new weather if they are outside. The weather itself is kept on the zone."""
+        if self.is_outdoors():
+            for content in self.contents:
                 content.msg(appearance.ambient + weather["start_msg"])
 
         if weather["effect"]:
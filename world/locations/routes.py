@@ -0,0 +1,279 @@
+"""
+Shortest routes between rooms over the exit graph, and walking them one step at a time.
+
+Routes within a zone are found with A*, using rooms' coordinates to head the right way first. Routes between zones
+first pick which zones to pass through from a table of the exits connecting each pair of zones (their gateways), then
+find the way across each zone in turn, so a long trip never searches rooms in zones it doesn't pass through. Finished
+routes are kept in an LRU cache, which is cleared whenever exits are added or removed or the location tree changes.
+Opening and closing doors doesn't clear it; instead a cached route is only used if its doors are all still open.
+"""
+import heapq
+from collections import OrderedDict, deque
+
+from evennia.utils import delay
+
+from world.locations.exit_graph import EXIT_GRAPH
+from world.locations.rooms import hierarchy_version
+
+ROUTE_CACHE_SIZE = 500
+WALK_STEP_SECONDS = 1
+
+_routes = OrderedDict()  # (start room id, goal room ids) -> (route, EXIT_GRAPH.version when it was found)
+_gateways = None  # zone -> {neighboring zone: [(room id, exit id) for each exit into it]}
+_zones = {}  # room id -> zone
+_version = None
+_START = object()  # Marks the start of a path, since rooms outside any zone have None for their zone
+
+
+def _check_version():
+    """Forget everything computed from an older exit graph or location tree."""
+    global _gateways, _version
+    version = (EXIT_GRAPH.topology_version, hierarchy_version())
+    if version != _version:
+        _routes.clear()
+        _zones.clear()
+        _gateways = None
+        _version = version
+
+
+def zone_of(room_id):
+    try:
+        return _zones[room_id]
+    except KeyError:
+        room = EXIT_GRAPH.get(room_id)
+        _zones[room_id] = room.zone() if room else None
+        return _zones[room_id]
+
+
+def passable(edge):
+    """Routes avoid closed doors, but not other locks, which will stop whoever is walking when they get there."""
+    return edge is not None and edge.traverse_lock != "traverse:false()"
+
+
+def current_edge(room_id, exit_id):
+    """Returns the exit's edge as it is now, since doors may have opened or closed since a route was found."""
+    return EXIT_GRAPH.rooms.get(room_id, {}).get(exit_id)
+
+
+def gateways():
+    """
+    Returns the table of exits leading from each zone into each other zone, building it if needed. Closed doors are
+    included, so check passable() when using them.
+    """
+    global _gateways
+    _check_version()
+    if _gateways is None:
+        _gateways = {}
+        for room_id, edges in EXIT_GRAPH.rooms.items():
+            zone = zone_of(room_id)
+            for edge in edges.values():
+                next_zone = zone_of(edge.destination)
+                if next_zone != zone:
+                    _gateways.setdefault(zone, {}).setdefault(next_zone, []).append((room_id, edge.exit))
+    return _gateways
+
+
+def _coordinates(room_id):
+    room = EXIT_GRAPH.get(room_id)
+    return tuple(room.db.coordinates) if room and room.db.coordinates else None
+
+
+def _astar(start_id, goal_ids, zone):
+    """
+    Find the shortest way from a room to the nearest of the goal rooms without leaving the zone.
+
+    :param start_id: Id of the room to start in.
+    :param goal_ids: Ids of the rooms to reach, which should be in the zone.
+    :param zone: The zone to search in.
+    :return: List of (direction, exit id, room id) steps, or None if no goal can be reached.
+    """
+    goal_coordinates = [coordinates for coordinates in (_coordinates(goal) for goal in goal_ids) if coordinates]
+
+    def heuristic(room_id):
+        # Each exit moves at most one square along each axis, so no room is fewer steps away than its furthest axis
+        coordinates = _coordinates(room_id)
+        if not coordinates or not goal_coordinates:
+            return 0
+        return min(max(abs(a - b) for a, b in zip(coordinates, goal)) for goal in goal_coordinates)
+
+    came_from = {start_id: None}
+    steps_to = {start_id: 0}
+    frontier = [(heuristic(start_id), 0, start_id)]
+    pushed = 0
+    while frontier:
+        _, _, room_id = heapq.heappop(frontier)
+        if room_id in goal_ids:
+            route = []
+            while came_from[room_id]:
+                previous_id, direction, exit_id = came_from[room_id]
+                route.append((direction, exit_id, room_id))
+                room_id = previous_id
+            route.reverse()
+            return route
+
+        for edge in EXIT_GRAPH.rooms.get(room_id, {}).values():
+            next_id = edge.destination
+            if not passable(edge) or zone_of(next_id) != zone:
+                continue
+            steps = steps_to[room_id] + 1
+            if steps < steps_to.get(next_id, steps + 1):
+                steps_to[next_id] = steps
+                came_from[next_id] = (room_id, edge.direction, edge.exit)
+                pushed += 1
+                heapq.heappush(frontier, (steps + heuristic(next_id), pushed, next_id))
+    return None
+
+
+def _zone_path(start_zone, goal_zones):
+    """Returns the fewest zones to pass through from start_zone to any of goal_zones, including both ends."""
+    table = gateways()
+    came_from = {start_zone: _START}
+    queue = deque([start_zone])
+    while queue:
+        zone = queue.popleft()
+        if zone in goal_zones:
+            path = [zone]
+            while came_from[path[-1]] is not _START:
+                path.append(came_from[path[-1]])
+            return list(reversed(path))
+        for next_zone, exits_into in table.get(zone, {}).items():
+            if next_zone not in came_from and any(passable(current_edge(*gateway)) for gateway in exits_into):
+                came_from[next_zone] = zone
+                queue.append(next_zone)
+    return None
+
+
+def _cross_zones(start_id, goal_ids):
+    goals_by_zone = {}
+    for goal in goal_ids:
+        goals_by_zone.setdefault(zone_of(goal), set()).add(goal)
+    zone_path = _zone_path(zone_of(start_id), goals_by_zone)
+    if not zone_path:
+        return None
+
+    route = []
+    room_id = start_id
+    table = gateways()
+    for zone, next_zone in zip(zone_path, zone_path[1:]):
+        # Cross this zone to whichever of its gateways into the next zone is closest, and step through
+        exits_out = {}
+        for gateway_id, exit_id in table[zone][next_zone]:
+            edge = current_edge(gateway_id, exit_id)
+            if passable(edge):
+                exits_out.setdefault(gateway_id, edge)
+        leg = _astar(room_id, set(exits_out), zone)
+        if leg is None:
+            return None
+        route.extend(leg)
+        gateway_id = leg[-1][2] if leg else room_id
+        edge = exits_out[gateway_id]
+        route.append((edge.direction, edge.exit, edge.destination))
+        room_id = edge.destination
+
+    leg = _astar(room_id, goals_by_zone[zone_path[-1]], zone_path[-1])
+    if leg is None:
+        return None
+    return route + leg
+
+
+def route_open(start_id, route, version):
+    """
+    Whether a cached route can still be used: none of its doors have closed since it was found, or, if no route was
+    found, no doors have opened or closed at all.
+    """
+    if route is None:
+        return version == EXIT_GRAPH.version
+    room_id = start_id
+    for direction, exit_id, next_id in route:
+        if not passable(current_edge(room_id, exit_id)):
+            return False
+        room_id = next_id
+    return True
+
+
+def find_route(start, goals):
+    """
+    Returns the route from a room to the nearest of the given rooms, from the cache if it was found before.
+
+    :param start: The room to start from.
+    :param goals: Rooms to head for; the route ends at whichever of these is closest.
+    :return: List of (direction, exit id, room id) steps (empty if already there), or None if there is no way there.
+    """
+    _check_version()
+    goal_ids = frozenset(goal.id for goal in goals)
+    key = (start.id, goal_ids)
+    if key in _routes:
+        route, version = _routes[key]
+        if route_open(start.id, route, version):
+            _routes.move_to_end(key)
+            return route
+
+    route = None
+    start_zone = zone_of(start.id)
+    if any(zone_of(goal) == start_zone for goal in goal_ids):
+        route = _astar(start.id, goal_ids, start_zone)
+    if route is None:
+        route = _cross_zones(start.id, goal_ids)
+
+    _routes[key] = (route, EXIT_GRAPH.version)
+    if len(_routes) > ROUTE_CACHE_SIZE:
+        _routes.popitem(last=False)
+    return route
+
+
+# <editor-fold desc="Walking">
+def start_walk(traveler, route):
+    """Set the traveler walking along a route, taking one step every WALK_STEP_SECONDS."""
+    stop_walk(traveler)
+    traveler.ndb.walk_route = route
+    traveler.ndb.walk_step = 0
+    traveler.ndb.walk_from = traveler.location.id
+    traveler.ndb.walk_task = delay(WALK_STEP_SECONDS, take_walk_step, traveler)
+
+
+def stop_walk(traveler):
+    """Stop walking, returning True if the traveler was walking."""
+    task = traveler.ndb.walk_task
+    traveler.ndb.walk_task = None
+    traveler.ndb.walk_route = None
+    if task and task.active():
+        task.cancel()
+        return True
+    return False
+
+
+def take_walk_step(traveler):
+    route = traveler.ndb.walk_route
+    if not route:
+        return
+    traveler.ndb.walk_task = None
+    if not traveler.location or traveler.location.id != traveler.ndb.walk_from:
+        # Moved some other way since the last step
+        traveler.msg("You stop walking.")
+        stop_walk(traveler)
+        return
+    if traveler.is_in_combat():
+        traveler.msg("You stop walking to fight!")
+        stop_walk(traveler)
+        return
+
+    direction, exit_id, room_id = route[traveler.ndb.walk_step]
+    ex = EXIT_GRAPH.get(exit_id)
+    if ex and ex.access(traveler, "traverse"):
+        ex.at_traverse(traveler, ex.destination)
+    elif ex:
+        ex.at_failed_traverse(traveler)
+    if not traveler.location or traveler.location.id != room_id:
+        traveler.msg("Your way is blocked, and you stop walking.")
+        stop_walk(traveler)
+        return
+
+    traveler.ndb.walk_step += 1
+    traveler.ndb.walk_from = room_id
+    if traveler.ndb.walk_step >= len(route):
+        traveler.msg("You have arrived.")
+        stop_walk(traveler)
+    else:
+        traveler.ndb.walk_task = delay(WALK_STEP_SECONDS, take_walk_step, traveler)
+
+# </editor-fold>
@@ -0,0 +1,411 @@
+"""
+Saving and loading whole regions, zones, localities, areas and rooms as world files, for building large areas outside
+the game and for making test worlds reproducible.
+
+A world file is JSON Lines - one record per line - so it can be written out and read back in as it goes, however
+big the world is. Records are written parents first and exits last, so every record only refers to things above it:
+
+    {"type": "region", "key": "Larkspur", "desc": "", "minimum_rec_level": null}
+    {"type": "zone", "key": "Vale", "region": "Larkspur", "desc": "", "recommended_level": 1,
+        "weathers": [["Sunny", "0.75"], ["Raining", "0.25"]]}
+    {"type": "locality", "key": "Millbrook", "zone": "Vale", "desc": "", "recommended_level": 1}
+    {"type": "area", "key": "Town Square", "locality": "Millbrook", "desc": "", "recommended_level": 1}
+    {"type": "room", "id": 12, "key": "Fountain Plaza", "area": "Town Square", "desc": "...", "environment": "garden",
+        "coordinates": [0, 0, 0], "fixtures": [{"typeclass": "typeclasses.inanimate.fixtures.Fountain",
+        "key": "fountain", "desc": "Water trickles down the fountain."}], "spawns": [{"prototype": "hellhound"}],
+        "replenish": ["apple"]}
+    {"type": "exit", "room": 12, "destination": 13, "key": "north", "aliases": ["n"], "door": false, "open": true}
+
+Room ids only need to be unique within the file. Locations are matched by key, so rooms can be loaded into a zone
+that already exists.
+"""
+import json
+from decimal import Decimal
+
+import evennia
+from django.db import transaction
+from evennia.prototypes import prototypes as protlib
+from evennia.prototypes import spawner
+from evennia.utils import inherits_from, class_from_module
+from evennia.utils.containers import GLOBAL_SCRIPTS
+
+from typeclasses.inanimate.items.item_types.containers import Container
+from typeclasses.inanimate.items.items import Item
+from typeclasses.scripts.item_scripts import is_hidden
+from typeclasses.scripts.room_scripts import ReplenishItem
+from typeclasses.scripts.weather import WEATHERS
+from world.ingame_map_display import invalidate_maps
+from world.locations.areas import Area
+from world.locations.exit_graph import EXIT_GRAPH
+from world.locations.exits import Exit, Door
+from world.locations.localities import Locality
+from world.locations.regions import Region
+from world.locations.rooms import Room, hierarchy_changed
+from world.locations.zones import Zone
+
+LOCATION_TYPES = {"region": Region, "zone": Zone, "locality": Locality, "area": Area}
+# Which attribute holds each location's parent, and which attribute of the parent lists its children
+PARENT_ATTRIBUTES = {"zone": ("region", "zones"), "locality": ("zone", "localities"), "area": ("locality", "areas")}
+
+
+# <editor-fold desc="Saving">
+def location_record(location_type, location):
+    record = {"type": location_type, "key": location.key, "desc": location.db.desc}
+    if location_type == "region":
+        record["minimum_rec_level"] = location.db.minimum_rec_level
+    else:
+        record["recommended_level"] = location.db.recommended_level
+    if location_type in PARENT_ATTRIBUTES:
+        parent = location.attributes.get(PARENT_ATTRIBUTES[location_type][0])
+        record[PARENT_ATTRIBUTES[location_type][0]] = parent.key if parent else None
+    if location_type == "zone":
+        record["weathers"] = [[weather["key"], str(weight)] for weather, weight in location.db.weathers]
+    return record
+
+
+def saved_contents(room):
+    """Returns the room's contents that belong in a world file, leaving out anything that comes and goes in play."""
+    replenished = room.replenishers()
+    contents = []
+    for content in room.contents:
+        if (content.destination or inherits_from(content, "typeclasses.living.players.PlayerCharacter")
+                or content.id in replenished  # Saved under "replenish" instead
+                or inherits_from(content, "typeclasses.living.corpses.Corpse")
+                or is_hidden(content)):  # Defeated and waiting to respawn somewhere else
+            continue
+        # Loose items are ones players dropped, since items that belong in a room are replenished
+        if inherits_from(content, Item) and not inherits_from(content, Container):
+            continue
+        contents.append(content)
+    return contents
+
+
+def room_record(room):
+    fixtures, spawns = [], []
+    for content in saved_contents(room):
+        if inherits_from(content, "typeclasses.inanimate.fixtures.Fixture"):
+            fixtures.append({"typeclass": content.typeclass_path, "key": content.key, "desc": content.db.desc})
+        elif content.tags.get(category="from_prototype"):
+            spawns.append({"prototype": content.tags.get(category="from_prototype")})
+        else:
+            spawns.append({"typeclass": content.typeclass_path, "key": content.key})
+    return {
+        "type": "room", "id": room.id, "key": room.key, "area": room.db.area.key, "desc": room.db.desc,
+        "environment": room.db.environment, "coordinates": list(room.db.coordinates or ()),
+        "fixtures": fixtures, "spawns": spawns,
+        "replenish": [script.db.from_prototype or script.db.item.tags.get(category="from_prototype")
+                      for script in room.scripts.all() if isinstance(script, ReplenishItem)
+                      and (script.db.from_prototype or script.db.item)]
+    }
+
+
+def exit_record(ex):
+    return {"type": "exit", "room": ex.location.id, "destination": ex.destination.id, "key": ex.key,
+            "aliases": ex.aliases.all(), "door": inherits_from(ex, Door),
+            "open": ex.locks.get("traverse") != "traverse:false()"}
+
+
+def world_records(regions):
+    """Yields the records for everything in the given regions, parents first and exits last."""
+    rooms = []
+    for region in regions:
+        yield location_record("region", region)
+        for zone in region.db.zones:
+            yield location_record("zone", zone)
+            for locality in zone.db.localities:
+                yield location_record("locality", locality)
+                for area in locality.db.areas:
+                    yield location_record("area", area)
+                    for room in area.db.rooms:
+                        yield room_record(room)
+                        rooms.append(room)
+
+    # Exits go last so their destinations are always already loaded, and only between rooms that were saved
+    room_ids = {room.id for room in rooms}
+    for room in rooms:
+        for ex in room.exits:
+            if ex.destination.id in room_ids:
+                yield exit_record(ex)
+
+
+def save_world(path, regions=None):
+    """
+    Write the given regions (or every region) to a world file.
+
+    :param path: File to write to.
+    :param regions: Regions to save, defaulting to all of them.
+    :return: Dict of how many records of each type were written.
+    """
+    if regions is None:
+        regions = [script for script in GLOBAL_SCRIPTS.all() if inherits_from(script, Region)]
+    counts = {}
+    with open(path, "w") as world_file:
+        for record in world_records(regions):
+            world_file.write(json.dumps(record) + "\n")
+            counts[record["type"]] = counts.get(record["type"], 0) + 1
+    return counts
+
+
+# </editor-fold>
+
+# <editor-fold desc="Loading">
+def read_records(path):
+    """Yields (line number, record) for each record in a world file."""
+    with open(path) as world_file:
+        for line_number, line in enumerate(world_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} isn't valid JSON: {e}")
+
+
+class WorldChecker:
+    """
+    Checks a world file's records before anything is created from them - that every parent, room and prototype they
+    refer to will be there when they're loaded - so a bad file is turned down without touching the game.
+    """
+
+    def __init__(self):
+        self.locations = set()  # (type, key) of locations in the file
+        self.room_ids = set()
+        self.weathers = {weather["key"] for weather in WEATHERS}
+        self.prototypes = set()
+
+    def check_location(self, location_type, key):
+        if (location_type, key) in self.locations:
+            return
+        location = GLOBAL_SCRIPTS.get(key)
+        if not location or not inherits_from(location, LOCATION_TYPES[location_type]):
+            raise ValueError(f"No {location_type} called '{key}'")
+
+    def check_prototype(self, prototype_key):
+        if prototype_key not in self.prototypes:
+            if not protlib.search_prototype(key=prototype_key):
+                raise ValueError(f"No prototype called '{prototype_key}'")
+            self.prototypes.add(prototype_key)
+
+    def check_record(self, record):
+        record_type = record.get("type")
+        if record_type in LOCATION_TYPES:
+            location = GLOBAL_SCRIPTS.get(record["key"])
+            if location and not inherits_from(location, LOCATION_TYPES[record_type]):
+                raise ValueError(f"'{record["key"]}' already exists and isn't a {record_type}")
+            if record_type in PARENT_ATTRIBUTES and record.get(PARENT_ATTRIBUTES[record_type][0]):
+                parent_type = PARENT_ATTRIBUTES[record_type][0]
+                self.check_location(parent_type, record[parent_type])
+            for key, weight in record.get("weathers") or []:
+                if key not in self.weathers:
+                    raise ValueError(f"No weather called '{key}'")
+                Decimal(weight)
+            self.locations.add((record_type, record["key"]))
+        elif record_type == "room":
+            self.check_location("area", record["area"])
+            if record["id"] in self.room_ids:
+                raise ValueError(f"Room id {record["id"]} is used twice")
+            self.room_ids.add(record["id"])
+            for fixture in record.get("fixtures", []):
+                class_from_module(fixture["typeclass"])
+            for spawn in record.get("spawns", []):
+                if spawn.get("prototype"):
+                    self.check_prototype(spawn["prototype"])
+                else:
+                    class_from_module(spawn["typeclass"])
+            for prototype in record.get("replenish", []):
+                self.check_prototype(prototype)
+        elif record_type == "exit":
+            if record["room"] not in self.room_ids or record["destination"] not in self.room_ids:
+                raise ValueError(f"Exit {record["key"]} refers to a room that isn't in the file")
+        else:
+            raise ValueError(f"Unknown record type: {record_type}")
+
+
+class WorldLoader:
+    """
+    Creates everything in a world file. Updates that would otherwise be repeated for every new object - writing each
+    location's list of children, indexing zones by coordinates, pairing doors, adding exits to the exit graph and
+    clearing maps - are held until the end and done once.
+    """
+
+    def __init__(self):
+        self.locations = {}  # (type, key) -> location
+        self.rooms = {}  # id in file -> new room
+        self.children = {}  # parent location -> new children to add to its list
+        self.doors = {}  # (room, destination) -> new door
+        self.created = []  # Every new object and script, to drop from the caches if the load is rolled back
+        self.moved_zones = set()  # Zones that existing locations were moved out of
+        self.counts = {}
+
+    def get_location(self, location_type, key):
+        """Returns a location loaded from the file or, failing that, an existing one with the same key."""
+        location = self.locations.get((location_type, key))
+        if not location:
+            location = GLOBAL_SCRIPTS.get(key)
+            if not location or not inherits_from(location, LOCATION_TYPES[location_type]):
+                raise ValueError(f"No {location_type} called '{key}'")
+            self.locations[(location_type, key)] = location
+        return location
+
+    def load_location(self, record):
+        location_type = record["type"]
+        location = GLOBAL_SCRIPTS.get(record["key"])
+        if location and not inherits_from(location, LOCATION_TYPES[location_type]):
+            raise ValueError(f"'{record["key"]}' already exists and isn't a {location_type}")
+        if not location:
+            location = evennia.create_script(key=record["key"], typeclass=LOCATION_TYPES[location_type])
+            self.created.append(location)
+        self.locations[(location_type, record["key"])] = location
+
+        location.db.desc = record.get("desc", "")
+        if location_type == "region":
+            location.db.minimum_rec_level = record.get("minimum_rec_level")
+        else:
+            location.db.recommended_level = record.get("recommended_level")
+        if location_type == "zone" and record.get("weathers"):
+            weathers_by_key = {weather["key"]: weather for weather in WEATHERS}
+            location.db.weathers = [(weathers_by_key[key], Decimal(weight)) for key, weight in record["weathers"]]
+        if location_type in PARENT_ATTRIBUTES and record.get(PARENT_ATTRIBUTES[location_type][0]):
+            parent_type, children_attribute = PARENT_ATTRIBUTES[location_type]
+            parent = self.get_location(parent_type, record[parent_type])
+            old_parent = location.attributes.get(parent_type)
+            if old_parent and old_parent != parent:
+                # Moving an existing location, so take it out of its old parent's list
+                siblings = old_parent.attributes.get(children_attribute)
+                if siblings and location in siblings:
+                    siblings.remove(location)
+                if parent_type == "zone":
+                    self.moved_zones.add(old_parent)
+                elif parent_type == "locality" and old_parent.db.zone:
+                    self.moved_zones.add(old_parent.db.zone)
+            location.attributes.add(parent_type, parent)
+            self.children.setdefault((parent, children_attribute), []).append(location)
+
+    def load_room(self, record):
+        area = self.get_location("area", record["area"])
+        room = evennia.create_object(typeclass=Room, key=record["key"], attributes=[
+            ("desc", record.get("desc", "")), ("environment", record.get("environment")),
+            ("coordinates", tuple(record.get("coordinates", ()))), ("area", area)])
+        self.created.append(room)
+        self.rooms[record["id"]] = room
+        self.children.setdefault((area, "rooms"), []).append(room)
+
+        for fixture in record.get("fixtures", []):
+            self.created.append(evennia.create_object(typeclass=fixture["typeclass"], key=fixture["key"],
+                                                      location=room, attributes=[("desc", fixture.get("desc", ""))]))
+        for spawn in record.get("spawns", []):
+            if spawn.get("prototype"):
+                obj = spawner.spawn(spawn["prototype"])[0]
+                self.created.append(obj)
+                obj.move_to(room, quiet=True)
+            else:
+                self.created.append(evennia.create_object(typeclass=spawn["typeclass"], key=spawn["key"],
+                                                          location=room))
+        for prototype in record.get("replenish", []):
+            item = spawner.spawn(prototype)[0]
+            self.created.append(item)
+            item.move_to(room, quiet=True)
+            self.created.append(evennia.create_script(typeclass=ReplenishItem, obj=room,
+                                                      attributes=[("item", item), ("from_prototype", prototype)]))
+
+    def load_exit(self, record):
+        room, destination = self.rooms[record["room"]], self.rooms[record["destination"]]
+        ex = evennia.create_object(typeclass=Door if record.get("door") else Exit, key=record["key"],
+                                   aliases=record.get("aliases", []), location=room, destination=destination)
+        self.created.append(ex)
+        if record.get("door"):
+            if record.get("open"):
+                ex.locks.add("traverse:all()")
+            self.doors[(room, destination)] = ex
+
+    def load_record(self, record):
+        record_type = record.get("type")
+        if record_type in LOCATION_TYPES:
+            self.load_location(record)
+        elif record_type == "room":
+            self.load_room(record)
+        elif record_type == "exit":
+            self.load_exit(record)
+        else:
+            raise ValueError(f"Unknown record type: {record_type}")
+        self.counts[record_type] = self.counts.get(record_type, 0) + 1
+
+    def finish(self):
+        """Make the updates held back while loading."""
+        for (parent, children_attribute), children in self.children.items():
+            existing = parent.attributes.get(children_attribute, [])
+            parent.attributes.add(children_attribute, existing + [child for child in children if child not in existing])
+        for (room, destination), door in self.doors.items():
+            return_door = self.doors.get((destination, room))
+            if return_door:
+                door.db.return_exit = return_door
+
+        hierarchy_changed()
+        for zone in self.touched_zones():
+            zone.rebuild_room_index()
+
+    def touched_zones(self):
+        """Zones with rooms that were added or moved by the load."""
+        zones = set(self.moved_zones)
+        for (location_type, key), location in self.locations.items():
+            if location_type == "area":
+                location = location.db.locality
+            if location and location_type in ("area", "locality"):
+                location = location.db.zone
+            if location and location_type != "region":
+                zones.add(location)
+        return zones
+
+    def forget(self):
+        """
+        After the load is rolled back, drop what it created from Evennia's object cache, and reload the Attributes of
+        the existing locations it changed, so nothing in memory still refers to objects that were never saved.
+        """
+        zones = self.touched_zones()
+        for obj in self.created:
+            obj.flush_from_cache(force=True)
+        for location in set(self.locations.values()) | zones:
+            if location not in self.created:
+                location.attributes.reset_cache()
+                if inherits_from(location, Zone):
+                    location.ndb.room_index = None  # Rebuilt when next needed
+
+
+def load_world(path):
+    """
+    Create everything in a world file in one database transaction. The whole file is checked first, so a bad file
+    changes nothing, and if creating fails anyway partway through, everything is rolled back.
+
+    Exits aren't added to the exit graph as they're created, and maps aren't cleared for each one; the graph is built
+    and maps cleared once at the end instead. Each object's own creation hooks still run as it's created, since they
+    set up the Attributes it needs.
+
+    :param path: File to read.
+    :return: Dict of how many records of each type were loaded.
+    """
+    checker = WorldChecker()
+    for line_number, record in read_records(path):
+        try:
+            checker.check_record(record)
+        except KeyError as e:
+            raise ValueError(f"Line {line_number} is missing {e}")
+        except (ValueError, ImportError, ArithmeticError) as e:
+            raise ValueError(f"Line {line_number}: {e}")
+
+    loader = WorldLoader()
+    try:
+        with transaction.atomic(), EXIT_GRAPH.deferred():
+            for line_number, record in read_records(path):
+                loader.load_record(record)
+            loader.finish()
+    except Exception:
+        loader.forget()
+        hierarchy_changed()
+        raise
+    finally:
+        # Built once here rather than for every exit, and again after a rollback to drop the new exits
+        EXIT_GRAPH.build()
+        invalidate_maps()
+    return loader.counts
+
+# </editor-fold>
@@ -1,3 +1,6 @@
+import evennia
+from evennia.utils import inherits_from
+
 from typeclasses.scripts.weather import *
 
 
@@ -12,19 +15,142 @@ class Zone(Script):
         self.db.weathers = []
         self.db.current_weather = None
 
+    def at_server_start(self):
+        if self.attributes.has("room_index"):  # Left over from when the coordinate index was saved
+            self.attributes.remove("room_index")
+
     def update_weather(self, weather):
-        """Sets the current weather attribute on the zone, and runs update_weather on all rooms."""
+        """
+        Sets the current weather on the zone, which its rooms read it from, and tells anyone outdoors in the zone about
+        the change.
+        """
         self.db.current_weather = weather
-        for locality in self.db.localities:
-            for area in locality.db.areas:
-                for room in area.db.rooms:
-                    if room.is_outdoors():
-                        room.update_weather(weather)
+        for room in self.occupied_rooms():
+            if room.is_outdoors():
+                room.update_weather(weather)
+
+    # <editor-fold desc="Occupancy">
+    def occupied_rooms(self):
+        """
+        Returns the rooms in this zone that players are currently in. Kept in memory as players move, and rebuilt from
+        the players online after a reload.
+        """
+        if self.ndb.occupied_rooms is None:
+            occupied = set()
+            for session in evennia.SESSION_HANDLER.get_sessions():
+                puppet = session.puppet
+                if puppet and puppet.location and inherits_from(puppet.location, "world.locations.rooms.Room"):
+                    if puppet.location.zone() == self:
+                        occupied.add(puppet.location)
+            self.ndb.occupied_rooms = occupied
+        return self.ndb.occupied_rooms
+
+    def room_occupied(self, room):
+        self.occupied_rooms().add(room)
+
+    def room_vacated(self, room):
+        self.occupied_rooms().discard(room)
+    # </editor-fold>
+
+    # <editor-fold desc="Coordinates">
+    def rooms(self):
+        """Every room in the zone, walking down through its localities and areas."""
+        return [room for locality in self.db.localities for area in locality.db.areas for room in area.db.rooms]
+
+    def room_index(self):
+        """
+        Returns {(x, y, z): room} for every room in the zone with coordinates. Kept in memory, and built from the rooms'
+        coordinates the first time it's needed after a reload.
+        """
+        index = self.ndb.room_index
+        if index is None:
+            index = self.rebuild_room_index()
+        return index
+
+    def rebuild_room_index(self):
+        index = {}
+        for room in self.rooms():
+            coordinates = room.db.coordinates
+            if coordinates:
+                index[tuple(coordinates)] = room
+        self.ndb.room_index = index
+        return index
+
+    def index_room(self, room):
+        """
+        Add the room under its coordinates, if it has any.
+
+        :return: The room already at those coordinates, which is left in place, or None if the room was indexed.
+        """
+        coordinates = room.db.coordinates
+        if coordinates:
+            index = self.room_index()
+            coordinates = tuple(coordinates)
+            existing = index.get(coordinates)
+            if existing and existing != room:
+                return existing
+            index[coordinates] = room
+        return None
+
+    def unindex_room(self, room):
+        """Remove the room from the index, if it's what is indexed at its coordinates."""
+        coordinates = room.db.coordinates
+        if coordinates:
+            index = self.room_index()
+            coordinates = tuple(coordinates)
+            if index.get(coordinates) == room:
+                del index[coordinates]
 
     def get_room(self, x, y, z):
-        coordinates = (x, y, z)
-        for locality in self.db.localities:
-            for area in locality.db.areas:
-                for room in area.db.rooms:
-                    if room.db.coordinates == coordinates:
-                        return room
\ No newline at end of file
+        return self.room_index().get((x, y, z))
+
+    def rooms_near(self, x, y, z, radius=1, same_level=True):
+        """
+        Returns all rooms within the given number of squares of the coordinates, not including a room at the
+        coordinates themselves.
+
+        :param x: The x coordinate to search around.
+        :param y: The y coordinate to search around.
+        :param z: The z coordinate to search around.
+        :param radius: How many squares away in each direction to look.
+        :param same_level: If False, also look the same distance up and down.
+        """
+        z_range = range(z, z + 1) if same_level else range(z - radius, z + radius + 1)
+        index = self.room_index()
+        rooms = []
+        for room_z in z_range:
+            for room_y in range(y - radius, y + radius + 1):
+                for room_x in range(x - radius, x + radius + 1):
+                    if (room_x, room_y, room_z) == (x, y, z):
+                        continue
+                    room = index.get((room_x, room_y, room_z))
+                    if room:
+                        rooms.append(room)
+        return rooms
+    # </editor-fold>
+
+
+def rezone_rooms(rooms, old_zone, new_zone):
+    """
+    Move the given rooms from one zone's coordinate and occupancy indexes to another's after the location tree
+    changes. Rooms whose coordinates are already taken in the new zone are left out of its coordinate index.
+
+    :return: A message for each room that couldn't be indexed, to show whoever moved them.
+    """
+    if old_zone == new_zone:
+        return []
+    problems = []
+    for room in rooms:
+        occupied = False
+        if old_zone:
+            old_zone.unindex_room(room)
+            occupied = room in old_zone.occupied_rooms()
+            old_zone.room_vacated(room)
+        if new_zone:
+            existing = new_zone.index_room(room)
+            if existing:
+                problems.append(f"{room.get_display_name()} wasn't given its coordinates {tuple(room.db.coordinates)}"
+                                f" in {new_zone.name}, since {existing.get_display_name()} is already there.")
+            if occupied:
+                new_zone.room_occupied(room)
+    return problems
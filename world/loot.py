@@ -0,0 +1,78 @@
+"""
+Loot tables decide what a defeated entity leaves in its corpse, without it carrying the items around beforehand.
+
+An entity's loot_table Attribute names one of the LOOT_TABLES. Each table gives a range of gold and a list of rolls,
+and each roll picks one entry by weight, where an entry of None drops nothing:
+
+    "hellhound": {
+        "gold": (0, 5),
+        "rolls": [
+            [("health_potion", 1), (None, 4)],  # A 1 in 5 chance of a health potion
+        ]
+    }
+
+Only prototype keys are rolled when the entity dies; the items themselves are created when someone first looks in or
+takes from the corpse (see Corpse.prepare_contents).
+"""
+import random
+
+LOOT_TABLES = {
+    "hellhound": {
+        "gold": (0, 5),
+        "rolls": [
+            [("health_potion", 1), (None, 4)],
+        ]
+    },
+}
+
+
+class AliasTable:
+    """Picks from weighted choices in constant time, however many there are, using Vose's alias method."""
+
+    def __init__(self, weighted_choices):
+        self.choices = [choice for choice, weight in weighted_choices]
+        total = sum(weight for choice, weight in weighted_choices)
+        num = len(self.choices)
+        # Each choice's weight scaled so that the average is 1
+        scaled = [weight * num / total for choice, weight in weighted_choices]
+        self.odds = [1.0] * num
+        self.aliases = list(range(num))
+
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            # The column for 'less' is topped up with 'more'
+            self.odds[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+    def pick(self):
+        column = random.randrange(len(self.choices))
+        if random.random() < self.odds[column]:
+            return self.choices[column]
+        return self.choices[self.aliases[column]]
+
+
+_alias_tables = {}  # loot table key -> [AliasTable for each roll]
+
+
+def roll_loot(table_key):
+    """
+    Roll a loot table.
+
+    :param table_key: Key of one of the LOOT_TABLES.
+    :return: (list of prototype keys, amount of gold), or ([], 0) if there is no such table.
+    """
+    table = LOOT_TABLES.get(table_key)
+    if not table:
+        return [], 0
+    try:
+        rolls = _alias_tables[table_key]
+    except KeyError:
+        rolls = _alias_tables[table_key] = [AliasTable(roll) for roll in table.get("rolls", [])]
+
+    prototypes = [prototype for prototype in (roll.pick() for roll in rolls) if prototype]
+    gold = random.randint(*table.get("gold", (0, 0)))
+    return prototypes, gold
@@ -8,5 +8,6 @@ HELLHOUND = {
     "hostile_to_players": "True",
     "char_defense": {None: 5},
     "evasion": 15,
-    "abilities": [create_object(typeclass=Scratch, key="Scratch")]
+    "abilities": [create_object(typeclass=Scratch, key="Scratch")],
+    "loot_table": "hellhound"
 }
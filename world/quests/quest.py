@@ -35,27 +35,43 @@ from evennia.utils.containers import GLOBAL_SCRIPTS
 from typeclasses.scripts.scripts import Script
 
 
+# Bumped whenever quest data is edited, so the in-memory catalog knows to reload it
+_QUESTS_VERSION = 0
+_catalog = None  # (version, {qid: quest data}) sorted by QID
+
+
+def quests_changed():
+    """Call after changing any quest data in the All Quests script."""
+    global _QUESTS_VERSION
+    _QUESTS_VERSION += 1
+
+
+def stored_quests():
+    """Returns the saved quest data itself, for editing. Call quests_changed() after."""
+    return GLOBAL_SCRIPTS.get("All Quests").db.quests
+
+
 def all_quests():
-    quests = GLOBAL_SCRIPTS.get("All Quests").db.quests
-    quests = dict(sorted(quests.items()))
-    return quests
+    """
+    Returns all quest data sorted by QID, loaded from the All Quests script only when it has changed since last time.
+    This is a read-only copy - edit stored_quests() instead.
+    """
+    global _catalog
+    if _catalog is None or _catalog[0] != _QUESTS_VERSION:
+        quests = stored_quests().deserialize()
+        _catalog = (_QUESTS_VERSION, dict(sorted(quests.items())))
+    return _catalog[1]
 
 
 def get_quest(qid):
-    try:
-        return all_quests()[qid]
-    except KeyError:
-        return None
+    return all_quests().get(qid)
 
 
 def get_stage(qid, stage):
     quest_data = get_quest(qid)
     if quest_data is None or stage is None:
         return None
-    try:
-        return quest_data["stages"][stage]
-    except KeyError:
-        return None
+    return quest_data.get("stages", {}).get(stage)
 
 
 # TODO: Account for multiple objects with hooks per quest stage
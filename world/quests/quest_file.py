@@ -0,0 +1,270 @@
+"""
+Exporting and importing quests as quest files, so quest packs can be written and checked outside the game and loaded
+in one go, instead of one questedit or questhook at a time.
+
+Like world files, a quest file is JSON Lines - one record per line. It holds the quest data from the All Quests script,
+and the quest hooks on every object a quest stage is tied to:
+
+    {"type": "quest", "qid": 3, "data": {"desc": "Help an injured hunter", "long_desc": "", "recommended_level": 2}}
+    {"type": "stage", "qid": 3, "stage": 1, "data": {"desc": "Talk to Attoah", "objective_type": "at_talk",
+        "object": {"object": 41, "key": "Attoah"}, "location": "Hunter's Rest, Millbrook, Vale"}}
+    {"type": "hook", "object": {"object": 41, "key": "Attoah"}, "hook_type": "at_talk", "qid": 3, "stage": 1,
+        "data": {"spoken_lines": ["Thank the stars!"], "next_stage": "3.2"}}
+
+References to objects are written as {"object": <id>, "key": <key>}, so the objects must already exist in the game the
+file is imported into (i.e. from a world file saved in the same game). validate_records() checks a quest file, or the
+live quest data, for hooks and stages on missing objects, next stages that don't exist, and stages no hook leads to.
+"""
+import json
+import os
+from collections import deque
+
+from django.db import transaction
+from evennia.objects.models import ObjectDB
+from evennia.utils.containers import GLOBAL_SCRIPTS
+
+from world.quests.quest import all_quests, quests_changed, stored_quests
+from world.quests.quest_hooks import hooks_changed
+
+
+# <editor-fold desc="Object references">
+def to_record_value(value):
+    """Returns a copy of quest or hook data that can be written as JSON, with objects replaced by references."""
+    if isinstance(value, ObjectDB):
+        return {"object": value.id, "key": value.key}
+    if isinstance(value, dict):
+        return {key: to_record_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_record_value(item) for item in value]
+    return value
+
+
+def is_reference(value):
+    return isinstance(value, dict) and set(value) == {"object", "key"}
+
+
+def references(value):
+    """Yields every object reference in record data."""
+    if is_reference(value):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from references(item)
+
+
+def from_record_value(value):
+    """Returns record data with object references replaced by the objects, or None for objects that don't exist."""
+    if is_reference(value):
+        return ObjectDB.objects.get_id(value["object"])
+    if isinstance(value, dict):
+        return {key: from_record_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_record_value(item) for item in value]
+    return value
+
+
+# </editor-fold>
+
+# <editor-fold desc="Exporting">
+def quest_records():
+    """Yields the records for all quests and their stages, then the hooks on every object a stage is tied to."""
+    hooked_objects = []
+    for qid, quest in all_quests().items():
+        yield {"type": "quest", "qid": qid,
+               "data": to_record_value({key: value for key, value in quest.items() if key != "stages"})}
+        for stage, stage_data in sorted(quest.get("stages", {}).items()):
+            yield {"type": "stage", "qid": qid, "stage": stage, "data": to_record_value(stage_data)}
+            obj = stage_data.get("object")
+            if obj and obj not in hooked_objects:
+                hooked_objects.append(obj)
+
+    for obj in hooked_objects:
+        # Deserialized, since the stored _SaverDicts and _SaverLists aren't dicts and lists to JSON
+        all_hooks = obj.db.quest_hooks.deserialize() if obj.db.quest_hooks else {}
+        for hook_type, hooks in all_hooks.items():
+            for qid in sorted(hooks):
+                for stage in sorted(hooks[qid]):
+                    yield {"type": "hook", "object": to_record_value(obj), "hook_type": hook_type, "qid": qid,
+                           "stage": stage, "data": to_record_value(hooks[qid][stage])}
+
+
+def export_quests(path):
+    """
+    Write all quests and their hooks to a quest file. It's written to a temporary file first and renamed when done, so
+    an export that fails partway doesn't leave half a file behind.
+
+    :param path: File to write to.
+    :return: Dict of how many records of each type were written.
+    """
+    counts = {}
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w") as quest_file:
+            for record in quest_records():
+                quest_file.write(json.dumps(record) + "\n")
+                counts[record["type"]] = counts.get(record["type"], 0) + 1
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return counts
+
+
+# </editor-fold>
+
+# <editor-fold desc="Validating">
+def parse_stage(stage_str, qid=None):
+    """
+    Returns (qid, stage) from a next_stage string like "3.2", None for "None", or raises ValueError. Older kill counter
+    stages store just the stage number, which is taken to be in the given quest.
+    """
+    if stage_str is None or stage_str == "None":
+        return None
+    if isinstance(stage_str, int) and qid is not None:
+        return qid, stage_str
+    qid, stage = str(stage_str).split(".")
+    return int(qid), int(stage)
+
+
+def next_stages(data):
+    """Yields the next_stage strings in hook or stage data, including those of each dialogue option."""
+    if data.get("next_stage") is not None:
+        yield data["next_stage"]
+    for option in data.get("options", []):
+        if option.get("next_stage") is not None:
+            yield option["next_stage"]
+
+
+def validate_records(records):
+    """
+    Checks quest records for problems, without changing anything.
+
+    :param records: Records as read from a quest file or yielded by quest_records().
+    :return: List of strings describing each problem found.
+    """
+    problems = []
+    quests = set()
+    stages = set()
+    leads_to = {}  # (qid, stage) -> [(qid, stage) that hooks at it advance to]
+    hooked = set()
+
+    def check_references(data, where):
+        for reference in references(data):
+            if not ObjectDB.objects.get_id(reference["object"]):
+                problems.append(f"{where}: object {reference["key"]} (#{reference["object"]}) doesn't exist")
+
+    def add_next_stages(data, qid, stage, where):
+        for stage_str in next_stages(data):
+            try:
+                next_stage = parse_stage(stage_str, qid)
+            except ValueError:
+                problems.append(f"{where}: can't read next stage '{stage_str}'")
+                continue
+            if next_stage:
+                leads_to.setdefault((qid, stage), []).append((next_stage, where))
+
+    for record in records:
+        record_type = record.get("type")
+        if record_type == "quest":
+            quests.add(record["qid"])
+        elif record_type == "stage":
+            where = f"Stage {record["qid"]}.{record["stage"]}"
+            stages.add((record["qid"], record["stage"]))
+            check_references(record.get("data", {}), where)
+            add_next_stages(record.get("data", {}), record["qid"], record["stage"], where)  # Kill counters
+        elif record_type == "hook":
+            where = f"{record["hook_type"]} hook {record["qid"]}.{record["stage"]} on {record["object"]["key"]}"
+            hooked.add((record["qid"], record["stage"]))
+            check_references(record["object"], where)
+            check_references(record.get("data", {}), where)
+            add_next_stages(record.get("data", {}), record["qid"], record["stage"], where)
+        else:
+            problems.append(f"Unknown record type: {record_type}")
+
+    for qid, stage in sorted(hooked - stages):
+        problems.append(f"Stage {qid}.{stage} has hooks but no quest data")
+    for stage_pairs in leads_to.values():
+        for next_stage, where in stage_pairs:
+            if next_stage not in stages:
+                problems.append(f"{where}: next stage {next_stage[0]}.{next_stage[1]} doesn't exist")
+
+    # Every player starts at stage 0 of every quest, so whatever can't be reached from there never will be
+    reached = {(qid, 0) for qid in quests}
+    queue = deque(reached)
+    while queue:
+        for next_stage, where in leads_to.get(queue.popleft(), []):
+            if next_stage not in reached:
+                reached.add(next_stage)
+                queue.append(next_stage)
+    for qid, stage in sorted(stages - reached):
+        problems.append(f"Stage {qid}.{stage} can't be reached from the start of any quest")
+    return problems
+
+
+# </editor-fold>
+
+# <editor-fold desc="Importing">
+def read_records(path):
+    records = []
+    with open(path) as quest_file:
+        for line_number, line in enumerate(quest_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} isn't valid JSON: {e}")
+    return records
+
+
+def import_quests(path):
+    """
+    Add or replace the quests, stages and hooks in a quest file. Quest data is written back to the All Quests script
+    once, and each hooked object's quest hooks once, all in one transaction.
+
+    :param path: File to read.
+    :return: (dict of how many records of each type were imported, list of problems from validate_records())
+    """
+    records = read_records(path)
+    problems = validate_records(records)
+
+    quests = stored_quests().deserialize()
+    hooks_by_object = {}  # object -> its quest hooks, with the file's hooks added
+    counts = {}
+    for record in records:
+        if record.get("type") not in ("quest", "stage", "hook"):
+            raise ValueError(f"Unknown record type: {record.get("type")}")
+        qid = record["qid"]
+        if record["type"] == "quest":
+            stages = quests.get(qid, {}).get("stages", {})
+            quests[qid] = from_record_value(record["data"])
+            quests[qid]["stages"] = stages
+        elif record["type"] == "stage":
+            quests.setdefault(qid, {"desc": "", "recommended_level": None, "stages": {}})
+            quests[qid].setdefault("stages", {})[record["stage"]] = from_record_value(record["data"])
+        elif record["type"] == "hook":
+            obj = from_record_value(record["object"])
+            if not obj:
+                raise ValueError(f"Object {record["object"]["key"]} (#{record["object"]["object"]}) doesn't exist")
+            if obj not in hooks_by_object:
+                hooks_by_object[obj] = obj.db.quest_hooks.deserialize() if obj.db.quest_hooks else {}
+            hooks = hooks_by_object[obj]
+            if record["hook_type"] not in hooks:
+                raise ValueError(f"{obj.key} doesn't handle {record["hook_type"]} hooks")
+            hooks[record["hook_type"]].setdefault(qid, {})[record["stage"]] = from_record_value(record["data"])
+        counts[record["type"]] = counts.get(record["type"], 0) + 1
+
+    with transaction.atomic():
+        GLOBAL_SCRIPTS.get("All Quests").db.quests = quests
+        for obj, hooks in hooks_by_object.items():
+            obj.db.quest_hooks = hooks
+    quests_changed()
+    for obj in hooks_by_object:
+        hooks_changed(obj)
+    return counts, problems
+
+# </editor-fold>
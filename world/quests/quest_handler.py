@@ -4,6 +4,17 @@ from server import appearance
 from world.quests.quest import get_stage, quest_desc
 from world.quests.quest_hooks import print_dialogue_options
 
+_typeclass_paths = {}  # class -> frozenset of the paths of every class it inherits from
+
+
+def typeclass_paths(cls):
+    """Returns the paths of the class and all of its parents, which kill counter target types are matched against."""
+    try:
+        return _typeclass_paths[cls]
+    except KeyError:
+        _typeclass_paths[cls] = frozenset(f"{parent.__module__}.{parent.__name__}" for parent in cls.__mro__)
+        return _typeclass_paths[cls]
+
 
 class QuestHandler:
     def __init__(self, player):
@@ -18,6 +29,14 @@ class QuestHandler:
         """Update the data used in these methods based on the player's quest stage data every time the handler is
         called."""
         self.data = self.player.db.quest_stages
+        self.stages = set(self.data.items())  # (qid, stage) for each quest the player has started
+        self._index_kill_counters()
+
+    def _index_kill_counters(self):
+        """Group the player's kill counters by target typeclass path, so a kill only looks at counters for its type."""
+        self.kill_targets = {}  # target type -> indexes in db.kill_counters
+        for i, kill_counter in enumerate(self.player.db.kill_counters or []):
+            self.kill_targets.setdefault(kill_counter["target_type"], []).append(i)
 
     def at_stage(self, qid, stage):
         """Given a quest hook dict containing a quest id and stage number, returns true if the player is currently at
@@ -27,6 +46,15 @@ class QuestHandler:
         else:
             return False
 
+    def stages_at(self, hooks):
+        """
+        Returns which of an object's quest hooks the player is at the stage for.
+
+        :param hooks: HookStages for one type of the object's hooks, from hook_stages()
+        :return: Sorted list of (qid, stage) pairs
+        """
+        return sorted((hooks.stages & self.stages) | {(qid, 0) for qid in hooks.starts if qid not in self.data})
+
     def advance_quest(self, stage_str):
         """Advance a player past a quest stage based on command-form quest-stage ID (0.0)"""
         if stage_str == "None":
@@ -47,7 +75,9 @@ class QuestHandler:
         stage = int(stage)
 
         # Reflect in the player's data that they are now at the new stage
+        self.stages.discard((qid, self.data.get(qid)))
         self.data[qid] = stage
+        self.stages.add((qid, stage))
 
         # Add kill counters to player if this stage is a kill counter objective
         stage_dict = get_stage(qid, stage)
@@ -56,9 +86,38 @@ class QuestHandler:
                 kc_dict = {"QID": qid, "stage": stage, "target_type": stage_dict["target_type"], "killed": 0,
                            "needed": stage_dict["kill_num"], "next_stage": stage_dict["next_stage"]}
                 self.player.db.kill_counters.append(kc_dict)
+                self._index_kill_counters()
 
         # Notify player
         self.player.msg(f"{appearance.notify}Quest updated: {quest_desc(qid, stage)}")
         self.player.msg(print_dialogue_options(qid, stage))
 
         self._save()
+
+    def at_kill(self, defeated):
+        """Count a defeated entity toward the player's kill counters for its type, advancing past any that fill up."""
+        counter_indexes = [i for path in typeclass_paths(type(defeated)) for i in self.kill_targets.get(path, ())]
+        if not counter_indexes:
+            return
+
+        kill_counters = self.player.db.kill_counters
+        completed = {}
+        for i in counter_indexes:
+            kill_counters[i]["killed"] += 1
+            if kill_counters[i]["killed"] >= kill_counters[i]["needed"]:
+                completed[i] = kill_counters[i].deserialize()
+        if not completed:
+            return
+
+        # Filled counters are done with, and are removed before advancing since that may add new ones
+        for i in sorted(completed, reverse=True):
+            del kill_counters[i]
+        self._index_kill_counters()
+        for kill_counter in completed.values():
+            stage_desc = quest_desc(qid=kill_counter["QID"], stage=kill_counter["stage"])
+            self.player.msg(f"{appearance.notify}You have completed: {stage_desc}!")
+            if isinstance(kill_counter["next_stage"], int):
+                # Kill counters made before next stages were stored as "QID.stage" hold just the stage number
+                self.advance_to(kill_counter["QID"], kill_counter["next_stage"])
+            else:
+                self.advance_quest(kill_counter["next_stage"])
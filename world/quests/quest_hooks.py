@@ -76,6 +76,8 @@ Properties of quest hooks by object type and hook type:
             next_stage
 """
 import collections
+import re
+from collections import namedtuple
 
 from evennia.utils import inherits_from
 from evennia.utils.dbserialize import _SaverList
@@ -85,15 +87,76 @@ from server import appearance
 from world.quests.quest import get_stage, quest_desc, get_hook_data
 
 
+# <editor-fold desc="Hook index">
+# The (qid, stage) pairs an object has hooks of one type for, and the QIDs of those at stage 0, which every player who
+# hasn't started that quest is at
+HookStages = namedtuple("HookStages", ["stages", "starts"])
+NO_HOOKS = HookStages(frozenset(), frozenset())
+
+_hook_index = {}  # object id -> {hook_type: HookStages}
+_dialogue_index = {}  # object id -> {(qid, stage): [(keywords, option)]} for its at_told hooks
+
+
+def index_hooks(obj):
+    """Returns {hook_type: HookStages} for all of an object's quest hooks."""
+    by_type = {}
+    for hook_type, hooks in (obj.db.quest_hooks or {}).items():
+        stages = frozenset((qid, stage) for qid in hooks for stage in hooks[qid])
+        by_type[hook_type] = HookStages(stages, frozenset(qid for qid, stage in stages if stage == 0))
+    return by_type
+
+
+def hook_stages(obj, hook_type):
+    """
+    Returns the HookStages for an object's hooks of the given type, reading its quest hooks only the first time.
+    Pass the result to a player's quests.stages_at() to find which hooks they trigger.
+    """
+    try:
+        by_type = _hook_index[obj.id]
+    except KeyError:
+        by_type = _hook_index[obj.id] = index_hooks(obj)
+    return by_type.get(hook_type, NO_HOOKS)
+
+
+def message_words(message):
+    """Returns the set of words in a message, lowercased and without punctuation, for matching dialogue keywords."""
+    return frozenset(re.findall(r"[\w']+", message.lower()))
+
+
+def dialogue_options(obj, qid, stage):
+    """
+    Returns an at_told hook's dialogue options with their keywords compiled into sets the first time they're used. An
+    option is chosen when its keywords are a subset of message_words() of what the player said.
+
+    :return: List of (frozenset of keywords, option dict), skipping options without keywords.
+    """
+    by_stage = _dialogue_index.setdefault(obj.id, {})
+    try:
+        return by_stage[(qid, stage)]
+    except KeyError:
+        options = obj.db.quest_hooks["at_told"][qid][stage].get("options", [])
+        compiled = []
+        for option in options:
+            keywords = frozenset(word for keyword in option["keywords"] for word in message_words(keyword))
+            if keywords:
+                compiled.append((keywords, option.deserialize()))
+        by_stage[(qid, stage)] = compiled
+        return compiled
+
+
+def hooks_changed(obj):
+    """Call after adding, removing or editing any of an object's quest hooks."""
+    _hook_index.pop(obj.id, None)
+    _dialogue_index.pop(obj.id, None)
+
+
+# </editor-fold>
+
 def get_hook_type(obj, qid, stage):
     """Given an object with quest hooks, returns the string hook/objective type assigned to the given qid and stage."""
-    quest_hooks = obj.db.quest_hooks
-    for hook_type in quest_hooks:
-        for hook_qid in quest_hooks[hook_type]:
-            if hook_qid == qid:
-                for hook_stage in quest_hooks[hook_type][qid]:
-                    if hook_stage == stage:
-                        return hook_type
+    for hook_type in obj.db.quest_hooks:
+        if (qid, stage) in hook_stages(obj, hook_type).stages:
+            return hook_type
 
 
 def location_string(qid, stage, objective_type=None, obj=None):
@@ -106,7 +169,7 @@ def location_string(qid, stage, objective_type=None, obj=None):
     :param obj: Override for the object the stage is tied to, indicating where the player needs to go
     :return: String of location names, increasing in localization
     """
-    stage = get_stage(qid, stage)  # Use stage # to get the stage data dict
+    stage = get_stage(qid, stage) or {}  # Use stage # to get the stage data dict
     objective_type = objective_type or stage.get("objective_type", "")
     obj = obj or stage.get("object", None)
 